@@ -0,0 +1,129 @@
+"""
+CPU cost per response for list and prediction payloads, measured through the
+same calls FastAPI's route handler makes, so the "before" column is what the
+installed FastAPI actually runs for these routes.
+
+  students/model      ORM objects -> response_model via fastapi.routing.serialize_response
+  students/rows       row tuples -> rows_response (returned as a Response, so FastAPI skips serialization)
+  prediction/model    dict -> response_model via serialize_response -> default response class
+  prediction/orjson   dict -> response_model via serialize_response -> FastJSONResponse
+
+Recent FastAPI versions serialize response_model routes straight to JSON bytes
+with pydantic when the default response class is used; a custom class such as
+FastJSONResponse turns that off. The prediction rows show whether a custom
+class would still pay off on the installed version.
+
+No database is needed: rows are generated in memory, so only serialization
+is measured. Run from backend/:
+    python -m benchmarks.bench_serialization --rows 100 --iterations 2000
+"""
+import argparse
+import inspect
+import time
+import uuid
+from datetime import datetime
+from typing import List
+
+def make_students(n: int):
+    from db import models
+    now = datetime.utcnow()
+    return [
+        models.Student(
+            id=str(uuid.uuid4()), name=f"Student {i}", institution_id="inst-1", age=19 + i % 8,
+            attendance_rate=60 + i % 40, gpa=2 + (i % 20) / 10, financial_stress_score=(i % 10) / 10,
+            family_support_score=1 - (i % 10) / 10, created_at=now
+        ) for i in range(n)
+    ]
+
+def make_prediction(features):
+    return {
+        "prediction_id": str(uuid.uuid4()),
+        "risk_score": 0.8312,
+        "risk_level": "Critical",
+        "shap_values": {name: 0.0123 * (i + 1) for i, name in enumerate(features)},
+        "explanation_status": "ready",
+        "alert_triggered": True,
+    }
+
+class Rows:
+    """The parts of a SQLAlchemy Result that rows_response uses."""
+    def __init__(self, keys, rows):
+        self._keys, self._rows = keys, rows
+
+    def keys(self):
+        return self._keys
+
+    def __iter__(self):
+        return iter(self._rows)
+
+def run_sync(coro):
+    """Drives a coroutine that never suspends, without event-loop overhead."""
+    try:
+        coro.send(None)
+    except StopIteration as done:
+        return done.value
+    raise RuntimeError("coroutine suspended")
+
+def measure(fn, iterations: int) -> float:
+    """CPU microseconds per call."""
+    fn()
+    started = time.process_time()
+    for _ in range(iterations):
+        fn()
+    return (time.process_time() - started) / iterations * 1e6
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=100)
+    parser.add_argument("--iterations", type=int, default=2000)
+    args = parser.parse_args()
+
+    from fastapi.responses import JSONResponse, Response
+    from fastapi.routing import APIRoute, serialize_response
+    from db import schemas
+    from core.responses import FastJSONResponse, rows_response
+    from ml.dataset import FEATURE_NAMES
+    from routes.students import STUDENT_COLUMNS
+
+    # Response fields built exactly as for the real routes
+    students_field = APIRoute("/students/", lambda: None, response_model=List[schemas.Student]).response_field
+    prediction_field = APIRoute("/predict", lambda: None, response_model=schemas.RiskPredictionResponse).response_field
+    # Older FastAPI has no dump_json fast path and renders the default class from a dict
+    fast_path = "dump_json" in inspect.signature(serialize_response).parameters
+
+    def default_route(field, content):
+        if fast_path:
+            return Response(run_sync(serialize_response(field=field, response_content=content, dump_json=True)),
+                            media_type="application/json").body
+        return JSONResponse(run_sync(serialize_response(field=field, response_content=content))).body
+
+    students = make_students(args.rows)
+    keys = [c.key for c in STUDENT_COLUMNS]
+    rows = Rows(keys, [tuple(getattr(s, k) for k in keys) for s in students])
+    prediction = make_prediction(FEATURE_NAMES)
+
+    def students_model():
+        return default_route(students_field, students)
+
+    def students_rows():
+        return rows_response(rows).body
+
+    def prediction_model():
+        return default_route(prediction_field, prediction)
+
+    def prediction_orjson():
+        return FastJSONResponse(run_sync(serialize_response(field=prediction_field, response_content=prediction))).body
+
+    print(f"FastAPI dump_json fast path: {'yes' if fast_path else 'no'}")
+    results = [
+        (f"students x{args.rows}", "model -> rows",
+         measure(students_model, args.iterations), measure(students_rows, args.iterations)),
+        ("prediction", "model -> orjson",
+         measure(prediction_model, args.iterations * 10), measure(prediction_orjson, args.iterations * 10)),
+    ]
+    print(f"{'payload':<16}{'path':<18}{'before us':>12}{'after us':>12}{'speedup':>10}")
+    for name, path, before, after in results:
+        print(f"{name:<16}{path:<18}{before:>12.1f}{after:>12.1f}{before / after:>9.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""
+Serving benchmark for serve.py.
+
+Starts the pre-fork server with the requested number of workers, drives it
+with keep-alive HTTP clients and reports:
+
+  * requests/sec overall and per core used by workers
+  * per-worker RSS, PSS and private memory from /proc/<pid>/smaps_rollup
+
+PSS is the number to watch: with the model shared copy-on-write it stays well
+below RSS, and the gap grows with the number of workers.
+
+Run from backend/:
+    python -m benchmarks.bench_serving --workers 4 --path /health
+    python -m benchmarks.bench_serving --workers 4 --method POST \\
+        --path /api/v1/risk/predict/<student_id> --token <jwt>
+"""
+import argparse
+import http.client
+import os
+import signal
+import subprocess
+import sys
+import threading
+import time
+
+def read_smaps_rollup(pid: int) -> dict:
+    fields = {}
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) >= 3 and parts[-1] == "kB":
+                fields[parts[0].rstrip(":")] = int(parts[1]) * 1024
+    return fields
+
+def child_pids(pid: int) -> list:
+    with open(f"/proc/{pid}/task/{pid}/children") as f:
+        return [int(p) for p in f.read().split()]
+
+def wait_ready(port: int, timeout: float = 120) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=2)
+            conn.request("GET", "/health")
+            if conn.getresponse().status == 200:
+                return
+        except OSError:
+            time.sleep(0.5)
+    raise RuntimeError("Server did not become healthy in time")
+
+def drive(port, method, path, headers, stop_at, counts, errors):
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+    done = failed = 0
+    while time.monotonic() < stop_at:
+        try:
+            conn.request(method, path, headers=headers)
+            resp = conn.getresponse()
+            resp.read()
+            if resp.status < 400:
+                done += 1
+            else:
+                failed += 1
+        except OSError:
+            failed += 1
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+    counts.append(done)
+    errors.append(failed)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--clients", type=int, default=64)
+    parser.add_argument("--duration", type=float, default=20)
+    parser.add_argument("--method", default="GET")
+    parser.add_argument("--path", default="/health")
+    parser.add_argument("--token")
+    args = parser.parse_args()
+
+    env = dict(os.environ, WEB_CONCURRENCY=str(args.workers), PORT=str(args.port))
+    server = subprocess.Popen([sys.executable, "serve.py"], env=env)
+    try:
+        wait_ready(args.port)
+        headers = {"Authorization": f"Bearer {args.token}"} if args.token else {}
+
+        counts, errors = [], []
+        stop_at = time.monotonic() + args.duration
+        threads = [
+            threading.Thread(target=drive, args=(args.port, args.method, args.path, headers, stop_at, counts, errors))
+            for _ in range(args.clients)
+        ]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        total = sum(counts)
+        rps = total / args.duration
+        cores = min(args.workers, os.cpu_count() or 1)
+        print(f"\n{args.method} {args.path}: {args.workers} workers, {args.clients} clients, {args.duration:.0f}s")
+        print(f"  requests ok={total} failed={sum(errors)}")
+        print(f"  throughput {rps:.1f} req/s, {rps / cores:.1f} req/s per core")
+
+        print(f"\n  {'pid':>8}{'RSS MiB':>10}{'PSS MiB':>10}{'private MiB':>13}{'shared MiB':>12}")
+        for pid in [server.pid] + child_pids(server.pid):
+            mem = read_smaps_rollup(pid)
+            private = mem.get("Private_Clean", 0) + mem.get("Private_Dirty", 0)
+            shared = mem.get("Shared_Clean", 0) + mem.get("Shared_Dirty", 0)
+            label = f"{pid}{'*' if pid == server.pid else ''}"
+            print(
+                f"  {label:>8}{mem.get('Rss', 0) / 2**20:>10.1f}{mem.get('Pss', 0) / 2**20:>10.1f}"
+                f"{private / 2**20:>13.1f}{shared / 2**20:>12.1f}"
+            )
+        print("  (* = parent holding the preloaded model)")
+    finally:
+        server.send_signal(signal.SIGTERM)
+        server.wait(timeout=60)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""
+Sustained write throughput of the embedded SQLite mode.
+
+Runs C concurrent "request" coroutines, each inserting one mental-health log
+row per iteration, for a fixed duration against a scratch database, and
+compares:
+
+  * per-request commit   - every coroutine opens a session and commits
+  * group commit         - every coroutine submits to the GroupCommitWriter
+
+Pragmas (WAL, synchronous, mmap, cache) are applied in both modes; set
+SQLITE_WAL=false / SQLITE_SYNCHRONOUS=FULL to measure the rollback-journal
+baseline.
+
+Run from backend/:
+    python -m benchmarks.bench_sqlite_writes --concurrency 64 --duration 10
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+def configure_database(path: str) -> None:
+    # Must happen before db.database is imported, since the engine is built at import
+    os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{path}"
+    os.environ["GROUP_COMMIT"] = "on"
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+async def run_mode(mode: str, concurrency: int, duration: float) -> dict:
+    from db.database import AsyncSessionLocal, engine, Base
+    from db.group_commit import group_writer
+    from db import models
+
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+        # Students table needs a row for the foreign key
+        await conn.execute(models.Student.__table__.insert().values(id="bench", name="bench"))
+
+    if mode == "group":
+        group_writer.start()
+
+    stop_at = time.monotonic() + duration
+    latencies, errors = [], 0
+
+    async def request_loop():
+        nonlocal errors
+        while time.monotonic() < stop_at:
+            log = models.MentalHealthLog(student_id="bench", text_entry="benchmark entry", sentiment_score=0.1)
+            started = time.perf_counter()
+            try:
+                if mode == "group":
+                    await group_writer.add_all([log])
+                else:
+                    async with AsyncSessionLocal() as session:
+                        session.add(log)
+                        await session.commit()
+                latencies.append(time.perf_counter() - started)
+            except Exception:
+                errors += 1
+
+    started = time.monotonic()
+    await asyncio.gather(*(request_loop() for _ in range(concurrency)))
+    elapsed = time.monotonic() - started
+
+    if mode == "group":
+        await group_writer.stop()
+    await engine.dispose()
+
+    latencies.sort()
+    p = lambda q: latencies[int(q * (len(latencies) - 1))] * 1000 if latencies else float("nan")
+    return {
+        "mode": mode,
+        "writes": len(latencies),
+        "errors": errors,
+        "writes_per_sec": len(latencies) / elapsed,
+        "p50_ms": p(0.50),
+        "p99_ms": p(0.99),
+        "batches": group_writer.stats.get("batches", 0) if mode == "group" else len(latencies),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--duration", type=float, default=10)
+    parser.add_argument("--mode", choices=["commit", "group"], help="Run a single mode (each mode needs a fresh process)")
+    args = parser.parse_args()
+
+    if args.mode is None:
+        # Each mode runs in its own interpreter so engines and writer state start clean
+        import subprocess
+        for mode in ("commit", "group"):
+            subprocess.run(
+                [sys.executable, "-m", "benchmarks.bench_sqlite_writes", "--mode", mode,
+                 "--concurrency", str(args.concurrency), "--duration", str(args.duration)],
+                check=True
+            )
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        configure_database(os.path.join(tmp, "bench.db"))
+        result = asyncio.run(run_mode(args.mode, args.concurrency, args.duration))
+
+    print(
+        f"{result['mode']:>7}: {result['writes_per_sec']:>9.1f} writes/s  "
+        f"p50 {result['p50_ms']:.2f}ms  p99 {result['p99_ms']:.2f}ms  "
+        f"transactions {result['batches']}  errors {result['errors']}"
+    )
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,223 @@
+import asyncio
+import json
+import math
+import time
+from collections import deque
+from typing import Optional
+from .config import settings
+
+class Rejected(Exception):
+    def __init__(self, status_code: int, retry_after: int, reason: str):
+        self.status_code = status_code
+        self.retry_after = retry_after
+        self.reason = reason
+
+class AdmissionController:
+    """
+    Concurrency limiter for one class of routes.
+
+    Requests beyond the limit wait in a bounded FIFO queue. A full queue is
+    rejected with 429; a request that cannot start within max_wait is
+    rejected with 503. With a latency target the limit adapts (AIMD): it
+    shrinks multiplicatively while observed latency exceeds the target and
+    grows by one otherwise, so the class backs off before queues build up.
+    """
+    def __init__(self, name: str, max_limit: int, min_limit: int = 1, target_latency: Optional[float] = None,
+                 max_wait: float = 2.0, queue_factor: float = 2.0, window: int = 20):
+        self.name = name
+        self.max_limit = max_limit
+        self.min_limit = min(min_limit, max_limit)
+        self.limit = max_limit
+        self.target_latency = target_latency
+        self.max_wait = max_wait
+        self.queue_factor = queue_factor
+        self.window = window
+        self.in_flight = 0
+        self._waiters = deque()
+        self._window_latencies = []
+        self.avg_latency = target_latency or 0.1
+        self.stats = {"admitted": 0, "waited": 0, "rejected_queue_full": 0, "rejected_deadline": 0}
+
+    @property
+    def max_queue(self) -> int:
+        return max(1, int(self.limit * self.queue_factor))
+
+    def retry_after(self) -> int:
+        # Rough time to drain the current queue at the current limit
+        backlog = len(self._waiters) + self.in_flight
+        return max(1, math.ceil(backlog * self.avg_latency / max(1, self.limit)))
+
+    async def acquire(self) -> None:
+        if self.in_flight < self.limit and not self._waiters:
+            self.in_flight += 1
+            self.stats["admitted"] += 1
+            return
+
+        if len(self._waiters) >= self.max_queue:
+            self.stats["rejected_queue_full"] += 1
+            raise Rejected(429, self.retry_after(), f"{self.name} queue is full")
+
+        future = asyncio.get_running_loop().create_future()
+        self._waiters.append(future)
+        self.stats["waited"] += 1
+        try:
+            await asyncio.wait_for(future, self.max_wait)
+        except asyncio.TimeoutError:
+            if future.done() and not future.cancelled():
+                # Granted just as the deadline hit: the slot is ours, so use it
+                self.stats["admitted"] += 1
+                return
+            self._discard(future)
+            self.stats["rejected_deadline"] += 1
+            raise Rejected(503, self.retry_after(), f"{self.name} queue wait exceeded {self.max_wait:.1f}s")
+        except asyncio.CancelledError:
+            # Client went away; give the slot back if it had already been granted
+            if future.done() and not future.cancelled():
+                self.release(None)
+            else:
+                self._discard(future)
+            raise
+        self.stats["admitted"] += 1
+
+    def release(self, latency: Optional[float]) -> None:
+        self.in_flight -= 1
+        if latency is not None:
+            self._observe(latency)
+        self._wake()
+
+    def _discard(self, future) -> None:
+        try:
+            self._waiters.remove(future)
+        except ValueError:
+            pass
+
+    def _wake(self) -> None:
+        while self._waiters and self.in_flight < self.limit:
+            future = self._waiters.popleft()
+            if not future.done():
+                # The slot is taken on the waiter's behalf before it resumes
+                self.in_flight += 1
+                future.set_result(True)
+
+    def _observe(self, latency: float) -> None:
+        self.avg_latency = 0.9 * self.avg_latency + 0.1 * latency
+        if self.target_latency is None:
+            return
+        self._window_latencies.append(latency)
+        if len(self._window_latencies) < self.window:
+            return
+        window = sorted(self._window_latencies)
+        self._window_latencies = []
+        p90 = window[int(len(window) * 0.9) - 1]
+        if p90 > self.target_latency:
+            self.limit = max(self.min_limit, int(self.limit * 0.8))
+        elif self.limit < self.max_limit:
+            self.limit += 1
+            self._wake()
+
+    def snapshot(self) -> dict:
+        return {
+            "limit": self.limit,
+            "max_limit": self.max_limit,
+            "in_flight": self.in_flight,
+            "queued": len(self._waiters),
+            "avg_latency_ms": round(self.avg_latency * 1000, 1),
+            **self.stats,
+        }
+
+def _build_controllers() -> dict:
+    wait = settings.ADMISSION_MAX_QUEUE_WAIT_MS / 1000
+    factor = settings.ADMISSION_QUEUE_FACTOR
+    return {
+        "ml": AdmissionController("ml", settings.ADMISSION_ML_CONCURRENCY, min_limit=2,
+                                  target_latency=settings.ADMISSION_ML_TARGET_MS / 1000, max_wait=wait, queue_factor=factor),
+        "llm": AdmissionController("llm", settings.ADMISSION_LLM_CONCURRENCY, min_limit=2,
+                                   target_latency=settings.ADMISSION_LLM_TARGET_MS / 1000, max_wait=wait, queue_factor=factor),
+        "bulk": AdmissionController("bulk", settings.ADMISSION_BULK_CONCURRENCY, max_wait=wait, queue_factor=factor),
+        # Streams are long-lived by design, so only their count is bounded
+        "stream": AdmissionController("stream", settings.ADMISSION_STREAM_CONCURRENCY, max_wait=0.01, queue_factor=0),
+        "default": AdmissionController("default", settings.ADMISSION_DEFAULT_CONCURRENCY, min_limit=8,
+                                       target_latency=settings.ADMISSION_DEFAULT_TARGET_MS / 1000, max_wait=wait, queue_factor=factor),
+    }
+
+controllers = _build_controllers()
+
+_api = settings.API_V1_STR
+# First matching prefix wins; health checks are never limited so Render always gets an answer
+ROUTE_CLASSES = [
+    ("/health", None),
+    (f"{_api}/risk/predict", "ml"),
+    (f"{_api}/risk/explanations", "ml"),
+    (f"{_api}/mental-health/log", "llm"),
+    (f"{_api}/admin/export", "bulk"),
+    (f"{_api}/admin/bias-audit", "bulk"),
+    (f"{_api}/alerts/stream", "stream"),
+]
+
+def classify(path: str) -> Optional[AdmissionController]:
+    if path == "/":
+        return None
+    for prefix, name in ROUTE_CLASSES:
+        if path.startswith(prefix):
+            return controllers[name] if name else None
+    return controllers["default"]
+
+class AdmissionMiddleware:
+    """Pure ASGI middleware so rejections happen before any routing or dependency work."""
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        # Preflights are cheap and must never be shed, or the browser can't read the real response
+        if scope["type"] != "http" or not settings.ADMISSION_ENABLED or scope["method"] == "OPTIONS":
+            return await self.app(scope, receive, send)
+        controller = classify(scope["path"])
+        if controller is None:
+            return await self.app(scope, receive, send)
+
+        try:
+            await controller.acquire()
+        except Rejected as r:
+            return await self._reject(send, r)
+
+        started = time.monotonic()
+        released = False
+
+        def release(latency):
+            nonlocal released
+            if not released:
+                released = True
+                controller.release(latency)
+
+        async def send_and_release(message):
+            await send(message)
+            # The response is complete here; background tasks (e.g. deferred SHAP) run
+            # after it inside self.app and must neither hold the slot nor count as latency
+            if message["type"] == "http.response.body" and not message.get("more_body", False):
+                release(time.monotonic() - started)
+
+        failed = False
+        try:
+            await self.app(scope, receive, send_and_release)
+        except Exception:
+            failed = True
+            raise
+        finally:
+            # Failures say nothing about capacity, so they don't feed the latency window
+            release(None if failed else time.monotonic() - started)
+
+    async def _reject(self, send, rejection: Rejected):
+        body = json.dumps({"detail": rejection.reason}).encode()
+        await send({
+            "type": "http.response.start",
+            "status": rejection.status_code,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"retry-after", str(rejection.retry_after).encode()),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
+
+def admission_snapshot() -> dict:
+    return {name: c.snapshot() for name, c in controllers.items()}
@@ -19,8 +19,102 @@ class Settings(BaseSettings):
     # DATABASE_URL from Supabase
     DATABASE_URL: str = os.getenv("DATABASE_URL", "sqlite+aiosqlite:///./dropout_ai.db")
     
+    # Optional read replica; reads fall back to the primary when unset
+    DATABASE_READ_URL: str = os.getenv("DATABASE_READ_URL", "")
+    READ_ROUTING_ENABLED: bool = os.getenv("READ_ROUTING_ENABLED", "true").lower() == "true"
+    READ_AFTER_WRITE_STICKY: bool = os.getenv("READ_AFTER_WRITE_STICKY", "true").lower() == "true"
+    # Comma separated path prefixes whose reads must always see the primary
+    READ_PRIMARY_PATHS: str = os.getenv("READ_PRIMARY_PATHS", "")
+    READ_POOL_SIZE: int = int(os.getenv("READ_POOL_SIZE", 10))
+    READ_MAX_OVERFLOW: int = int(os.getenv("READ_MAX_OVERFLOW", 20))
+    # Fraction of DB_MAX_CONNECTIONS that serve.py gives the replica pools when a replica is set
+    READ_CONNECTION_SHARE: float = float(os.getenv("READ_CONNECTION_SHARE", 0.5))
+
+    # Connection pool per process; serve.py derives these (and the replica's) from DB_MAX_CONNECTIONS
+    DB_POOL_SIZE: int = int(os.getenv("DB_POOL_SIZE", 10))
+    DB_MAX_OVERFLOW: int = int(os.getenv("DB_MAX_OVERFLOW", 20))
+    DB_MAX_CONNECTIONS: int = int(os.getenv("DB_MAX_CONNECTIONS", 60))
+
+    # Embedded SQLite mode
+    SQLITE_WAL: bool = os.getenv("SQLITE_WAL", "true").lower() == "true"
+    SQLITE_SYNCHRONOUS: str = os.getenv("SQLITE_SYNCHRONOUS", "NORMAL")
+    SQLITE_MMAP_SIZE: int = int(os.getenv("SQLITE_MMAP_SIZE", 256 * 1024 * 1024))
+    SQLITE_CACHE_SIZE_KB: int = int(os.getenv("SQLITE_CACHE_SIZE_KB", 64 * 1024))
+    SQLITE_BUSY_TIMEOUT_MS: int = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", 5000))
+    # "auto" enables the group-commit writer only on SQLite; "on"/"off" force it
+    GROUP_COMMIT: str = os.getenv("GROUP_COMMIT", "auto")
+    GROUP_COMMIT_MAX_BATCH: int = int(os.getenv("GROUP_COMMIT_MAX_BATCH", 256))
+    GROUP_COMMIT_MAX_DELAY_MS: float = float(os.getenv("GROUP_COMMIT_MAX_DELAY_MS", 0))
+
+    # Real-time alert stream
+    ALERT_SUBSCRIBER_BUFFER: int = int(os.getenv("ALERT_SUBSCRIBER_BUFFER", 100))
+    ALERT_HISTORY_SIZE: int = int(os.getenv("ALERT_HISTORY_SIZE", 1000))
+    ALERT_HEARTBEAT_SECONDS: float = float(os.getenv("ALERT_HEARTBEAT_SECONDS", 15))
+    # Lifetime of the ?ticket= credential EventSource connects with; it ends up in access logs
+    ALERT_STREAM_TICKET_SECONDS: int = int(os.getenv("ALERT_STREAM_TICKET_SECONDS", 60))
+
+    # Cold storage for old logs and predictions
+    ARCHIVE_DIR: str = os.getenv("ARCHIVE_DIR", os.path.join(os.path.dirname(os.path.dirname(__file__)), "archive"))
+    ARCHIVE_RETENTION_DAYS: int = int(os.getenv("ARCHIVE_RETENTION_DAYS", 365))
+    ARCHIVE_BATCH_SIZE: int = int(os.getenv("ARCHIVE_BATCH_SIZE", 5000))
+    ARCHIVE_COMPRESSION: str = os.getenv("ARCHIVE_COMPRESSION", "zstd")
+    # Archive files are sorted by student; smaller row groups let per-student reads skip more
+    ARCHIVE_ROW_GROUP_SIZE: int = int(os.getenv("ARCHIVE_ROW_GROUP_SIZE", 2048))
+    # How far back an archived-history read looks when the caller gives no start date
+    ARCHIVE_READ_MAX_DAYS: int = int(os.getenv("ARCHIVE_READ_MAX_DAYS", 730))
+
+    # Reporting exports
+    EXPORT_CHUNK_SIZE: int = int(os.getenv("EXPORT_CHUNK_SIZE", 10000))
+
+    # Per-institution caches: entries per tenant, and how many tenants stay resident
+    TENANT_CACHE_MAX_ENTRIES: int = int(os.getenv("TENANT_CACHE_MAX_ENTRIES", 32))
+    TENANT_CACHE_MAX_TENANTS: int = int(os.getenv("TENANT_CACHE_MAX_TENANTS", 256))
+    ANALYTICS_CACHE_TTL: float = float(os.getenv("ANALYTICS_CACHE_TTL", 30))
+
+    # Bias audit
+    BIAS_AUDIT_CHUNK_SIZE: int = int(os.getenv("BIAS_AUDIT_CHUNK_SIZE", 5000))
+    BIAS_PARITY_ALERT: float = float(os.getenv("BIAS_PARITY_ALERT", 0.1))
+    # Projection rows are stamped before commit; each run re-reads this far behind its watermark
+    BIAS_AUDIT_SETTLE_SECONDS: float = float(os.getenv("BIAS_AUDIT_SETTLE_SECONDS", 60))
+
+    # Admission control / load shedding per route class
+    ADMISSION_ENABLED: bool = os.getenv("ADMISSION_ENABLED", "true").lower() == "true"
+    ADMISSION_MAX_QUEUE_WAIT_MS: float = float(os.getenv("ADMISSION_MAX_QUEUE_WAIT_MS", 2000))
+    ADMISSION_QUEUE_FACTOR: float = float(os.getenv("ADMISSION_QUEUE_FACTOR", 2))
+    ADMISSION_ML_CONCURRENCY: int = int(os.getenv("ADMISSION_ML_CONCURRENCY", 8))
+    ADMISSION_ML_TARGET_MS: float = float(os.getenv("ADMISSION_ML_TARGET_MS", 500))
+    ADMISSION_LLM_CONCURRENCY: int = int(os.getenv("ADMISSION_LLM_CONCURRENCY", 16))
+    ADMISSION_LLM_TARGET_MS: float = float(os.getenv("ADMISSION_LLM_TARGET_MS", 4000))
+    ADMISSION_BULK_CONCURRENCY: int = int(os.getenv("ADMISSION_BULK_CONCURRENCY", 2))
+    ADMISSION_STREAM_CONCURRENCY: int = int(os.getenv("ADMISSION_STREAM_CONCURRENCY", 500))
+    ADMISSION_DEFAULT_CONCURRENCY: int = int(os.getenv("ADMISSION_DEFAULT_CONCURRENCY", 64))
+    ADMISSION_DEFAULT_TARGET_MS: float = float(os.getenv("ADMISSION_DEFAULT_TARGET_MS", 300))
+
+    # Pre-fork server (serve.py)
+    WEB_CONCURRENCY: int = int(os.getenv("WEB_CONCURRENCY", os.cpu_count() or 1))
+    MODEL_WATCH_INTERVAL: float = float(os.getenv("MODEL_WATCH_INTERVAL", 30))
+    WORKER_SHUTDOWN_TIMEOUT: float = float(os.getenv("WORKER_SHUTDOWN_TIMEOUT", 30))
+    WORKER_STARTUP_TIMEOUT: float = float(os.getenv("WORKER_STARTUP_TIMEOUT", 60))
+    
     # Google Gemini API Key from Render Environment
     GEMINI_API_KEY: str = os.getenv("GEMINI_API_KEY", "")
+
+    # Model training & registry
+    MODEL_DIR: str = os.getenv("MODEL_DIR", os.path.join(os.path.dirname(os.path.dirname(__file__)), "ml", "artifacts"))
+    TRAIN_CHUNK_SIZE: int = int(os.getenv("TRAIN_CHUNK_SIZE", 5000))
+    TRAIN_HOLDOUT_FRACTION: float = float(os.getenv("TRAIN_HOLDOUT_FRACTION", 0.2))
+    TRAIN_N_JOBS: int = int(os.getenv("TRAIN_N_JOBS", -1))
+    TRAIN_MIN_ROWS: int = int(os.getenv("TRAIN_MIN_ROWS", 200))
+    PROMOTE_MIN_AUC: float = float(os.getenv("PROMOTE_MIN_AUC", 0.75))
+    PROMOTE_MAX_AUC_REGRESSION: float = float(os.getenv("PROMOTE_MAX_AUC_REGRESSION", 0.02))
+
+    # Forest compaction
+    USE_COMPACT_MODEL: bool = os.getenv("USE_COMPACT_MODEL", "false").lower() == "true"
+    COMPACT_MAX_AUC_DROP: float = float(os.getenv("COMPACT_MAX_AUC_DROP", 0.01))
+    COMPACT_MAX_PROBA_DRIFT: float = float(os.getenv("COMPACT_MAX_PROBA_DRIFT", 0.05))
+
+    # SHAP explanations: "eager" (inline), "deferred" (background task) or "lazy" (on first read)
+    SHAP_MODE: str = os.getenv("SHAP_MODE", "eager")
     
     class Config:
         case_sensitive = True
@@ -1,18 +1,21 @@
-from fastapi import Depends, HTTPException, status
+from typing import Optional
+from fastapi import Depends, HTTPException, Query, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import jwt
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from db.database import get_db
+from db.database import get_db, get_read_db, AsyncSessionLocal
+from db.tenancy import scope_session
 from db import models
 from core.config import settings
 
 reusable_oauth2 = OAuth2PasswordBearer(tokenUrl=f"{settings.API_V1_STR}/auth/login")
+optional_oauth2 = OAuth2PasswordBearer(tokenUrl=f"{settings.API_V1_STR}/auth/login", auto_error=False)
 
-async def get_current_user(
-    db: AsyncSession = Depends(get_db), 
-    token: str = Depends(reusable_oauth2)
-) -> models.User:
+STREAM_TICKET_SCOPE = "alert-stream"
+
+async def load_token_user(db: AsyncSession, token: str, scope: Optional[str] = None) -> models.User:
+    """User a JWT was issued to; the token's scope must match exactly, so tickets never pass as bearer tokens."""
     try:
         payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
         user_id: str = payload.get("sub")
@@ -21,6 +24,11 @@ async def get_current_user(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Could not validate credentials",
         )
+    if payload.get("scope") != scope:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Could not validate credentials",
+        )
     
     result = await db.execute(select(models.User).filter(models.User.id == user_id))
     user = result.scalars().first()
@@ -28,7 +36,64 @@ async def get_current_user(
         raise HTTPException(status_code=404, detail="User not found")
     return user
 
+async def get_current_user(
+    db: AsyncSession = Depends(get_db), 
+    token: str = Depends(reusable_oauth2)
+) -> models.User:
+    return await load_token_user(db, token)
+
+def tenant_scope(user: models.User) -> Optional[str]:
+    """
+    Institution a user's sessions are scoped to. Only admins without an
+    institution (platform admins) are global; anyone else without one has
+    not been assigned yet and is refused.
+    """
+    if user.institution_id is None and user.role != "admin":
+        raise HTTPException(status_code=403, detail="No institution assigned")
+    return user.institution_id
+
+async def get_tenant_db(
+    db: AsyncSession = Depends(get_db),
+    current_user: models.User = Depends(get_current_user)
+) -> AsyncSession:
+    """
+    Request session scoped to the caller's institution: reads of tenant tables
+    are filtered and new rows are stamped automatically. Platform admins keep
+    global access; other users without an institution get 403.
+    """
+    scope_session(db, tenant_scope(current_user))
+    return db
+
+async def get_tenant_read_db(
+    db: AsyncSession = Depends(get_read_db),
+    current_user: models.User = Depends(get_current_user)
+) -> AsyncSession:
+    """Replica-routed variant of get_tenant_db for read-heavy endpoints."""
+    scope_session(db, tenant_scope(current_user))
+    return db
+
 async def get_current_admin(current_user: models.User = Depends(get_current_user)) -> models.User:
     if current_user.role != "admin":
         raise HTTPException(status_code=403, detail="Not enough permissions")
-    return current_user
\ No newline at end of file
+    return current_user
+
+async def get_stream_user(
+    ticket: Optional[str] = Query(None),
+    header_token: Optional[str] = Depends(optional_oauth2)
+) -> models.User:
+    """
+    Auth for long-lived streams. Browsers' EventSource cannot set headers, so it
+    connects with ?ticket= from POST /alerts/ticket: a short-lived token that only
+    this dependency accepts, since query strings end up in access logs. Uses its
+    own short session so the stream does not pin a pooled connection for its lifetime.
+    """
+    if not header_token and not ticket:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Not authenticated")
+    async with AsyncSessionLocal() as db:
+        if header_token:
+            user = await load_token_user(db, header_token)
+        else:
+            user = await load_token_user(db, ticket, scope=STREAM_TICKET_SCOPE)
+    if user.role not in ("admin", "counselor"):
+        raise HTTPException(status_code=403, detail="Not enough permissions")
+    return user
@@ -0,0 +1,32 @@
+from decimal import Decimal
+import orjson
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+def _default(obj):
+    if isinstance(obj, BaseModel):
+        return obj.model_dump()
+    if isinstance(obj, Decimal):
+        return float(obj)
+    raise TypeError(f"Type is not JSON serializable: {type(obj).__name__}")
+
+class FastJSONResponse(JSONResponse):
+    """
+    JSONResponse encoded with orjson. Datetimes, numpy scalars and dicts with
+    non-string keys are handled natively, so handlers can return plain rows.
+    """
+    def render(self, content) -> bytes:
+        return orjson.dumps(
+            content,
+            default=_default,
+            option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+        )
+
+def rows_response(result) -> FastJSONResponse:
+    """
+    Builds a response straight from a column SELECT. The rows come from our own
+    schema, so the per-row response_model validation is skipped; response_model
+    still documents the shape.
+    """
+    keys = list(result.keys())
+    return FastJSONResponse([dict(zip(keys, row)) for row in result])
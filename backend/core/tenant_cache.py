@@ -0,0 +1,87 @@
+import time
+from collections import Counter, OrderedDict
+from typing import Optional
+from .config import settings
+
+# Namespace for users without an institution (platform admins) who see every tenant
+GLOBAL_TENANT = "*"
+
+class TenantCache:
+    """
+    LRU cache partitioned by institution. Each tenant has its own namespace
+    with a fixed entry quota, so a large institution churning through keys
+    only evicts its own entries; whole namespaces are evicted least recently
+    used first once max_tenants is reached. Entries may carry a TTL.
+    """
+    def __init__(self, name: str, max_entries: int, max_tenants: int, ttl: Optional[float] = None):
+        self.name = name
+        self.max_entries = max_entries
+        self.max_tenants = max_tenants
+        self.ttl = ttl
+        self._namespaces = OrderedDict()
+        self.stats = Counter()
+
+    def _namespace(self, tenant: Optional[str], create: bool = False):
+        tenant = tenant or GLOBAL_TENANT
+        namespace = self._namespaces.get(tenant)
+        if namespace is None and create:
+            namespace = self._namespaces[tenant] = OrderedDict()
+            while len(self._namespaces) > self.max_tenants:
+                self._namespaces.popitem(last=False)
+                self.stats["tenant_evictions"] += 1
+        if namespace is not None:
+            self._namespaces.move_to_end(tenant)
+        return namespace
+
+    def get(self, tenant: Optional[str], key):
+        namespace = self._namespace(tenant)
+        entry = namespace.get(key) if namespace is not None else None
+        if entry is None or (entry[1] is not None and entry[1] < time.monotonic()):
+            if entry is not None:
+                del namespace[key]
+            self.stats["misses"] += 1
+            return None
+        namespace.move_to_end(key)
+        self.stats["hits"] += 1
+        return entry[0]
+
+    def set(self, tenant: Optional[str], key, value) -> None:
+        namespace = self._namespace(tenant, create=True)
+        expires = time.monotonic() + self.ttl if self.ttl else None
+        namespace[key] = (value, expires)
+        namespace.move_to_end(key)
+        while len(namespace) > self.max_entries:
+            namespace.popitem(last=False)
+            self.stats["evictions"] += 1
+
+    def invalidate(self, tenant: Optional[str] = None) -> None:
+        """Drops one tenant's namespace, or every namespace when tenant is None."""
+        if tenant is None:
+            self._namespaces.clear()
+        else:
+            self._namespaces.pop(tenant, None)
+
+    def snapshot(self) -> dict:
+        return {
+            "tenants": len(self._namespaces),
+            "entries": sum(len(ns) for ns in self._namespaces.values()),
+            "max_entries_per_tenant": self.max_entries,
+            "max_tenants": self.max_tenants,
+            **self.stats,
+        }
+
+# Registry of every tenant cache in the process, for the admin metrics endpoint
+tenant_caches = {}
+
+def make_tenant_cache(name: str, ttl: Optional[float] = None, max_entries: Optional[int] = None) -> TenantCache:
+    cache = TenantCache(
+        name,
+        max_entries or settings.TENANT_CACHE_MAX_ENTRIES,
+        settings.TENANT_CACHE_MAX_TENANTS,
+        ttl=ttl
+    )
+    tenant_caches[name] = cache
+    return cache
+
+def tenant_cache_snapshot() -> dict:
+    return {name: cache.snapshot() for name, cache in tenant_caches.items()}
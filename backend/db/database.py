@@ -1,7 +1,9 @@
 
+from sqlalchemy import event
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
 from sqlalchemy.orm import sessionmaker, declarative_base
 from core.config import settings
+from .routing import make_routing_session_class, instrument_pool, pool_metrics
 import os
 import logging
 
@@ -47,15 +49,58 @@ try:
         async_db_url,
         echo=False,
         pool_pre_ping=True,
-        pool_size=10,
-        max_overflow=20,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
         pool_recycle=300 # Shorter recycle for better stability on shared hosting
     )
 except Exception as e:
     logger.error(f"Failed to create engine: {e}")
     engine = create_async_engine("sqlite+aiosqlite:///./fatal_fallback.db")
 
+def enable_sqlite_pragmas(async_engine) -> None:
+    """WAL lets readers run alongside the single writer; the rest trades fsyncs for throughput."""
+    if async_engine.dialect.name != "sqlite":
+        return
+
+    @event.listens_for(async_engine.sync_engine, "connect")
+    def _set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        if settings.SQLITE_WAL:
+            cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute(f"PRAGMA synchronous={settings.SQLITE_SYNCHRONOUS}")
+        cursor.execute(f"PRAGMA mmap_size={settings.SQLITE_MMAP_SIZE}")
+        # Negative cache_size is in KiB rather than pages
+        cursor.execute(f"PRAGMA cache_size=-{settings.SQLITE_CACHE_SIZE_KB}")
+        cursor.execute(f"PRAGMA busy_timeout={settings.SQLITE_BUSY_TIMEOUT_MS}")
+        cursor.execute("PRAGMA temp_store=MEMORY")
+        cursor.close()
+
+enable_sqlite_pragmas(engine)
+
+# Read replica for analytics/listing traffic; shares the primary when no replica is configured
+if settings.DATABASE_READ_URL:
+    read_engine = create_async_engine(
+        get_async_url(settings.DATABASE_READ_URL),
+        echo=False,
+        pool_pre_ping=True,
+        pool_size=settings.READ_POOL_SIZE,
+        max_overflow=settings.READ_MAX_OVERFLOW,
+        pool_recycle=300
+    )
+    enable_sqlite_pragmas(read_engine)
+else:
+    read_engine = engine
+
+instrument_pool("primary", engine)
+if read_engine is not engine:
+    instrument_pool("replica", read_engine)
+
 AsyncSessionLocal = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+ReadSessionLocal = sessionmaker(
+    class_=AsyncSession,
+    sync_session_class=make_routing_session_class(engine, read_engine),
+    expire_on_commit=False
+)
 Base = declarative_base()
 
 async def get_db():
@@ -64,3 +109,17 @@ async def get_db():
             yield session
         finally:
             await session.close()
+
+async def get_read_db():
+    """Session for read-heavy endpoints, routed to the replica pool when safe."""
+    async with ReadSessionLocal() as session:
+        try:
+            yield session
+        finally:
+            await session.close()
+
+def get_pool_metrics() -> dict:
+    engines = {"primary": engine}
+    if read_engine is not engine:
+        engines["replica"] = read_engine
+    return pool_metrics(engines)
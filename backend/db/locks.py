@@ -0,0 +1,45 @@
+import asyncio
+import os
+import zlib
+from contextlib import asynccontextmanager
+from sqlalchemy import func, select
+from .database import engine
+
+try:
+    import fcntl
+except ImportError:  # Windows dev boxes run a single process
+    fcntl = None
+
+@asynccontextmanager
+async def cluster_lock(name: str, poll_interval: float = 0.1):
+    """
+    Exclusive lock across every worker process sharing the database, held for
+    the body of the block. Postgres takes a transaction-level advisory lock on
+    a dedicated connection (session-level locks don't survive PgBouncer's
+    transaction pooling); embedded SQLite, which only one host opens, takes an
+    flock on a file beside the database.
+    """
+    if engine.dialect.name == "postgresql":
+        async with engine.connect() as conn:
+            # Released when the connection's transaction ends, including on error
+            await conn.execute(select(func.pg_advisory_xact_lock(zlib.crc32(name.encode()))))
+            yield
+        return
+
+    path = engine.url.database
+    if engine.dialect.name != "sqlite" or fcntl is None or not path or path == ":memory:":
+        yield
+        return
+
+    fd = os.open(f"{path}.{name}.lock", os.O_CREAT | os.O_RDWR, 0o644)
+    try:
+        # Poll rather than block a thread, so a cancelled request gives the lock up cleanly
+        while True:
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                break
+            except BlockingIOError:
+                await asyncio.sleep(poll_interval)
+        yield
+    finally:
+        os.close(fd)
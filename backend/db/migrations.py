@@ -0,0 +1,70 @@
+import logging
+from sqlalchemy import inspect, literal, select, text
+from . import models
+
+logger = logging.getLogger(__name__)
+
+# Columns added to tables that existing deployments already have; create_all never alters a table.
+# Each entry is (model, column name, value for rows that predate the column or None to leave NULL).
+def student_institution(model):
+    """Correlated subquery copying institution_id from the row's student."""
+    return lambda: (
+        select(models.Student.__table__.c.institution_id)
+        .where(models.Student.__table__.c.id == model.__table__.c.student_id)
+        .scalar_subquery()
+    )
+
+ADDED_COLUMNS = [
+    (models.RiskPrediction, "features", None),
+    # Rows written before deferred SHAP were always explained inline
+    (models.RiskPrediction, "explanation_status", lambda: literal("ready")),
+    # Unknown for older rows; their pending explanations are marked stale rather than guessed
+    (models.RiskPrediction, "model_version", None),
+    (models.Student, "institution_id", None),
+    (models.User, "institution_id", None),
+    # After students.institution_id above, which these are filled from
+    (models.RiskPrediction, "institution_id", student_institution(models.RiskPrediction)),
+    (models.MentalHealthLog, "institution_id", student_institution(models.MentalHealthLog)),
+]
+
+def _add_column(sync_conn, model, name: str) -> bool:
+    """ALTER TABLE .. ADD COLUMN; False if another worker added it first."""
+    column = model.__table__.c[name]
+    ddl = f"ALTER TABLE {model.__tablename__} ADD COLUMN {name} {column.type.compile(dialect=sync_conn.dialect)}"
+    try:
+        # Savepoint so a lost race doesn't abort the surrounding (Postgres) transaction
+        with sync_conn.begin_nested():
+            sync_conn.execute(text(ddl))
+    except Exception:
+        existing = {c["name"] for c in inspect(sync_conn).get_columns(model.__tablename__)}
+        if name not in existing:
+            raise
+        return False
+    return True
+
+def add_missing_columns(sync_conn) -> list:
+    """
+    Brings tables created by an older release up to the current models:
+    adds each missing column, fills it for existing rows and creates the
+    table's indexes. Safe to run on every startup and from several workers.
+    """
+    added, altered = [], {}
+    for model, name, fill in ADDED_COLUMNS:
+        table = model.__table__
+        inspector = inspect(sync_conn)
+        if not inspector.has_table(table.name):
+            continue
+        if name in {c["name"] for c in inspector.get_columns(table.name)}:
+            continue
+        if not _add_column(sync_conn, model, name):
+            continue
+        if fill is not None:
+            sync_conn.execute(table.update().where(table.c[name].is_(None)).values({name: fill()}))
+        altered[table.name] = table
+        added.append(f"{table.name}.{name}")
+        logger.info(f"Added column {table.name}.{name}")
+    # Indexes last: one may span several columns added above
+    for table in altered.values():
+        for index in table.indexes:
+            index.create(sync_conn, checkfirst=True)
+    return added
@@ -1,6 +1,6 @@
 import uuid
 from datetime import datetime
-from sqlalchemy import Column, String, Float, Integer, Boolean, DateTime, ForeignKey, JSON, Enum
+from sqlalchemy import Column, String, Float, Integer, Boolean, DateTime, ForeignKey, JSON, Enum, Index
 from sqlalchemy.dialects.postgresql import UUID
 from .database import Base
 
@@ -11,12 +11,14 @@ class User(Base):
     hashed_password = Column(String, nullable=False)
     role = Column(String, default="student") # student, admin, counselor
     name = Column(String)
+    institution_id = Column(String, index=True) # None for platform-wide admins
     created_at = Column(DateTime, default=datetime.utcnow)
 
 class Student(Base):
     __tablename__ = "students"
     id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
     name = Column(String, nullable=False)
+    institution_id = Column(String, index=True)
     age = Column(Integer)
     attendance_rate = Column(Float, default=100.0)
     gpa = Column(Float, default=4.0)
@@ -28,20 +30,75 @@ class RiskPrediction(Base):
     __tablename__ = "risk_predictions"
     id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
     student_id = Column(String, ForeignKey("students.id"), nullable=False)
+    institution_id = Column(String) # copied from the student so tenant queries never join
     risk_score = Column(Float) # 0-1
     risk_level = Column(String) # Low, Medium, High, Critical
+    features = Column(JSON) # model inputs at prediction time, used for deferred SHAP
     shap_values = Column(JSON)
+    explanation_status = Column(String, default="ready") # pending, ready, failed, stale
+    model_version = Column(String) # model that produced risk_score; SHAP must explain the same one
     created_at = Column(DateTime, default=datetime.utcnow)
 
+    __table_args__ = (
+        # Tenant key leads so one institution's scans never touch another's rows
+        Index("ix_risk_predictions_institution_level_created", "institution_id", "risk_level", "created_at"),
+        Index("ix_risk_predictions_institution_student_created", "institution_id", "student_id", "created_at"),
+    )
+
+class StudentRiskCurrent(Base):
+    """Latest prediction per student, upserted on every write so dashboards never scan history."""
+    __tablename__ = "student_risk_current"
+    student_id = Column(String, ForeignKey("students.id"), primary_key=True)
+    institution_id = Column(String)
+    prediction_id = Column(String)
+    risk_score = Column(Float)
+    risk_level = Column(String)
+    previous_score = Column(Float)
+    trend = Column(String, default="STABLE") # INCREASING_RISK, DECREASING_RISK, STABLE
+    top_drivers = Column(JSON) # [{"feature": ..., "impact": ...}], highest positive SHAP first
+    predicted_at = Column(DateTime)
+    updated_at = Column(DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        # "Critical students in institution X, ordered by score"
+        Index("ix_risk_current_institution_level_score", "institution_id", "risk_level", "risk_score"),
+        Index("ix_risk_current_level_score", "risk_level", "risk_score"),
+        # Incremental consumers (bias audit) scan rows changed since their watermark
+        Index("ix_risk_current_updated_at", "updated_at"),
+    )
+
+class BiasAuditLedger(Base):
+    """What each student currently contributes to the audit aggregates, so updates can be subtracted."""
+    __tablename__ = "bias_audit_ledger"
+    student_id = Column(String, primary_key=True)
+    model_version = Column(String, nullable=False)
+    risk_score = Column(Float, nullable=False)
+    flagged = Column(Boolean, nullable=False)
+    groups = Column(JSON, nullable=False) # {dimension: group}
+
+class BiasAuditState(Base):
+    __tablename__ = "bias_audit_state"
+    model_version = Column(String, primary_key=True)
+    watermark = Column(DateTime) # updated_at of the newest projection row folded in
+    aggregates = Column(JSON, nullable=False) # {dimension: {group: GroupStats}}
+    rows_processed = Column(Integer, default=0)
+    computed_at = Column(DateTime, default=datetime.utcnow)
+
 class MentalHealthLog(Base):
     __tablename__ = "mental_health_logs"
     id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
     student_id = Column(String, ForeignKey("students.id"), nullable=False)
+    institution_id = Column(String)
     text_entry = Column(String, nullable=False)
     sentiment_score = Column(Float)
     crisis_flag = Column(Boolean, default=False)
     created_at = Column(DateTime, default=datetime.utcnow)
 
+    __table_args__ = (
+        Index("ix_mental_health_logs_institution_crisis_created", "institution_id", "crisis_flag", "created_at"),
+        Index("ix_mental_health_logs_institution_student_created", "institution_id", "student_id", "created_at"),
+    )
+
 class AuditLog(Base):
     __tablename__ = "audit_logs"
     id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
@@ -0,0 +1,112 @@
+from collections import Counter
+from contextvars import ContextVar
+from typing import Optional
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from sqlalchemy.sql.dml import UpdateBase
+from core.config import settings
+
+# Per-request routing state; a mutable dict so writes made anywhere in the request are seen by later reads
+_request_scope: ContextVar[Optional[dict]] = ContextVar("db_request_scope", default=None)
+
+routing_counts = Counter()
+pool_counts = {}
+
+
+def _primary_paths() -> list:
+    return [p.strip() for p in settings.READ_PRIMARY_PATHS.split(",") if p.strip()]
+
+
+def mark_write() -> None:
+    scope = _request_scope.get()
+    if scope is not None:
+        scope["wrote"] = True
+
+
+def _read_must_use_primary() -> Optional[str]:
+    """Returns the reason a read has to go to the primary, or None if the replica may serve it."""
+    scope = _request_scope.get()
+    if scope is None:
+        return None
+    if settings.READ_AFTER_WRITE_STICKY and scope["wrote"]:
+        return "sticky"
+    path = scope["path"]
+    if any(path.startswith(prefix) for prefix in _primary_paths()):
+        return "rule"
+    return None
+
+
+def make_routing_session_class(write_engine, read_engine):
+    """
+    Session class for read-mostly dependencies: SELECTs go to the replica
+    unless the request already wrote or matches a primary-only rule; any
+    flush or DML statement always goes to the primary.
+    """
+    class RoutingSession(Session):
+        def get_bind(self, mapper=None, clause=None, **kw):
+            if self._flushing or isinstance(clause, UpdateBase):
+                routing_counts["write"] += 1
+                return write_engine.sync_engine
+            if read_engine is write_engine or not settings.READ_ROUTING_ENABLED:
+                routing_counts["read:primary"] += 1
+                return write_engine.sync_engine
+            reason = _read_must_use_primary()
+            if reason:
+                routing_counts[f"read:primary:{reason}"] += 1
+                return write_engine.sync_engine
+            routing_counts["read:replica"] += 1
+            return read_engine.sync_engine
+
+    return RoutingSession
+
+
+@event.listens_for(Session, "after_flush")
+def _after_flush(session, flush_context):
+    mark_write()
+
+
+def instrument_pool(name: str, engine) -> None:
+    counts = pool_counts.setdefault(name, Counter())
+    pool = engine.sync_engine.pool
+
+    @event.listens_for(pool, "connect")
+    def _connect(dbapi_connection, connection_record):
+        counts["connects"] += 1
+
+    @event.listens_for(pool, "checkout")
+    def _checkout(dbapi_connection, connection_record, connection_proxy):
+        counts["checkouts"] += 1
+
+    @event.listens_for(pool, "checkin")
+    def _checkin(dbapi_connection, connection_record):
+        counts["checkins"] += 1
+
+
+def pool_metrics(engines: dict) -> dict:
+    metrics = {}
+    for name, engine in engines.items():
+        pool = engine.sync_engine.pool
+        stats = dict(pool_counts.get(name, {}))
+        for attr in ("size", "checkedin", "checkedout", "overflow"):
+            fn = getattr(pool, attr, None)
+            if callable(fn):
+                stats[attr] = fn()
+        stats["status"] = pool.status()
+        metrics[name] = stats
+    metrics["routing"] = dict(routing_counts)
+    return metrics
+
+
+class RequestScopeMiddleware:
+    """Pure ASGI middleware giving each HTTP request its own routing scope."""
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        token = _request_scope.set({"path": scope["path"], "wrote": False})
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _request_scope.reset(token)
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, EmailStr
-from typing import List, Optional, Dict
+from typing import Any, List, Optional, Dict
 from datetime import datetime
 
 class UserBase(BaseModel):
@@ -10,6 +10,17 @@ class UserBase(BaseModel):
 class UserCreate(UserBase):
     password: str
 
+class UserAssignment(BaseModel):
+    """Admin-only changes to a user's access; omitted fields are left as they are."""
+    role: Optional[str] = None
+    institution_id: Optional[str] = None
+
+class UserAccess(UserBase):
+    id: str
+    institution_id: Optional[str] = None
+    class Config:
+        from_attributes = True
+
 class UserLogin(BaseModel):
     email: EmailStr
     password: str
@@ -20,6 +31,7 @@ class Token(BaseModel):
 
 class StudentBase(BaseModel):
     name: str
+    institution_id: Optional[str] = None
     age: Optional[int] = None
     attendance_rate: float
     gpa: float
@@ -36,11 +48,31 @@ class Student(StudentBase):
         from_attributes = True
 
 class RiskPredictionResponse(BaseModel):
+    prediction_id: Optional[str] = None
     risk_score: float
     risk_level: str
-    shap_values: Dict[str, float]
+    shap_values: Optional[Dict[str, float]] = None
+    explanation_status: str = "ready"
     alert_triggered: bool
 
+class ExplanationResponse(BaseModel):
+    prediction_id: str
+    explanation_status: str
+    shap_values: Optional[Dict[str, float]] = None
+
+class StudentRiskCurrent(BaseModel):
+    student_id: str
+    institution_id: Optional[str] = None
+    prediction_id: Optional[str] = None
+    risk_score: float
+    risk_level: str
+    previous_score: Optional[float] = None
+    trend: str
+    top_drivers: Optional[List[Dict[str, Any]]] = None
+    predicted_at: Optional[datetime] = None
+    class Config:
+        from_attributes = True
+
 class MentalHealthLogCreate(BaseModel):
     text_entry: str
 
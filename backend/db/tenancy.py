@@ -0,0 +1,136 @@
+import argparse
+import asyncio
+from typing import Optional
+from sqlalchemy import Column, Table, event
+from sqlalchemy.orm import Session, with_loader_criteria
+from sqlalchemy.sql import visitors
+from .database import engine
+from .migrations import add_missing_columns, student_institution
+from . import models
+
+# Every table carrying an institution_id; queries against them are filtered for scoped sessions
+TENANT_MODELS = (
+    models.Student,
+    models.RiskPrediction,
+    models.MentalHealthLog,
+    models.StudentRiskCurrent,
+)
+TENANT_TABLES = frozenset(model.__tablename__ for model in TENANT_MODELS)
+
+class UnscopedQueryError(Exception):
+    """A scoped session ran a statement the tenant filter cannot apply to."""
+
+def scope_session(session, institution_id: Optional[str]) -> None:
+    """Restricts an (async) session to one institution; None leaves it unscoped."""
+    session.info["institution_id"] = institution_id
+
+def session_tenant(session) -> Optional[str]:
+    return session.info.get("institution_id")
+
+def stamp_tenant(objects, institution_id: Optional[str]) -> None:
+    """A scoped session can only write its own institution's rows."""
+    if institution_id is None:
+        return
+    for obj in objects:
+        if isinstance(obj, TENANT_MODELS):
+            obj.institution_id = institution_id
+
+def unscoped_tenant_tables(statement) -> set:
+    """
+    Tenant tables a statement reaches only through plain Core tables or
+    columns. with_loader_criteria filters the FROM of ORM entities and
+    attributes; a table with no ORM reference at all would bypass scoping.
+    """
+    referenced, orm_tables = set(), set()
+    for element in visitors.iterate(statement):
+        if isinstance(element, Column):
+            table = element.table
+        elif isinstance(element, Table):
+            table = element
+        else:
+            continue
+        if table is None:
+            continue
+        referenced.add(table.name)
+        if "parententity" in element._annotations:
+            orm_tables.add(table.name)
+    return (referenced - orm_tables) & TENANT_TABLES
+
+@event.listens_for(Session, "do_orm_execute")
+def _scope_to_tenant(execute_state):
+    institution_id = execute_state.session.info.get("institution_id")
+    if (
+        institution_id is None
+        or not (execute_state.is_select or execute_state.is_update or execute_state.is_delete)
+        or execute_state.is_column_load
+        or execute_state.is_relationship_load
+        or execute_state.execution_options.get("all_tenants", False)
+    ):
+        return
+    # Fail closed rather than return other institutions' rows
+    unscoped = unscoped_tenant_tables(execute_state.statement)
+    if unscoped:
+        raise UnscopedQueryError(
+            f"Scoped session queried {', '.join(sorted(unscoped))} through Core columns; select ORM attributes instead"
+        )
+    execute_state.statement = execute_state.statement.options(*(
+        with_loader_criteria(model, lambda cls: cls.institution_id == institution_id, include_aliases=True)
+        for model in TENANT_MODELS
+    ))
+
+@event.listens_for(Session, "before_flush")
+def _stamp_new_rows(session, flush_context, instances):
+    stamp_tenant(session.new, session.info.get("institution_id"))
+
+async def backfill() -> dict:
+    """
+    Adds any missing tenant columns and fills institution_id on rows that
+    still lack it, e.g. written by a worker running the previous release.
+    """
+    async with engine.begin() as conn:
+        added = await conn.run_sync(add_missing_columns)
+        counts = {}
+        for model in (models.RiskPrediction, models.MentalHealthLog):
+            table = model.__table__
+            result = await conn.execute(
+                table.update()
+                .where(table.c.institution_id.is_(None))
+                .values(institution_id=student_institution(model)())
+            )
+            counts[model.__tablename__] = result.rowcount
+    return {"columns_added": added, "rows_backfilled": counts}
+
+async def assign(emails, institution_id: Optional[str], role: Optional[str]) -> int:
+    """
+    Sets institution and/or role for existing users, e.g. to create the first
+    admin or to place users migrated with a NULL institution.
+    """
+    values = {"institution_id": institution_id}
+    if role:
+        values["role"] = role
+    async with engine.begin() as conn:
+        result = await conn.execute(
+            models.User.__table__.update().where(models.User.__table__.c.email.in_(emails)).values(values)
+        )
+    return result.rowcount
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Maintain institution keys on tenant-scoped tables.")
+    parser.add_argument("command", choices=["backfill", "assign"])
+    parser.add_argument("emails", nargs="*", help="users to assign")
+    parser.add_argument("--institution", help="institution to assign; omit for a platform-wide admin")
+    parser.add_argument("--role", choices=["student", "counselor", "admin"])
+    args = parser.parse_args()
+
+    if args.command == "assign":
+        if not args.emails:
+            parser.error("assign needs at least one email")
+        if args.institution is None and args.role != "admin":
+            parser.error("only admins can be left without an institution")
+        count = asyncio.run(assign(args.emails, args.institution, args.role))
+        print(f"{count} users assigned")
+    else:
+        report = asyncio.run(backfill())
+        print(f"Columns added: {report['columns_added'] or 'none'}")
+        for table, count in report["rows_backfilled"].items():
+            print(f"{table}: {count} rows backfilled")
@@ -6,8 +6,13 @@ from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 from core.config import settings
-from db.database import engine, Base
-from routes import auth, students, risk, mental_health, admin
+from core.admission import AdmissionMiddleware
+from db.database import engine, read_engine, Base
+from db.migrations import add_missing_columns
+from db.routing import RequestScopeMiddleware
+from db.group_commit import group_writer, group_commit_enabled
+from services.alert_hub import alert_hub
+from routes import auth, students, risk, mental_health, admin, history, alerts
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -19,13 +24,22 @@ app = FastAPI(
     docs_url="/docs"
 )
 
-# CORS configuration - strict but safe for current architecture
+# Per-request scope for read/write session routing (read-your-writes stickiness)
+app.add_middleware(RequestScopeMiddleware)
+
+# Shed load before any routing or dependency work
+app.add_middleware(AdmissionMiddleware)
+
+# CORS configuration - strict but safe for current architecture.
+# Added last so it is outermost: shed 429/503 responses still carry CORS headers
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"], 
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # Lets the dashboard read how long to back off after a 429/503
+    expose_headers=["Retry-After"],
 )
 
 # Database initialization with error handling
@@ -36,16 +50,36 @@ async def init_db():
         async with engine.begin() as conn:
             logger.info("Checking database schema...")
             await conn.run_sync(Base.metadata.create_all)
+            # create_all skips existing tables, so columns added since they were created are added here
+            await conn.run_sync(add_missing_columns)
             logger.info("Database initialized successfully.")
+        # Local replica stand-ins (e.g. a second SQLite file) need the schema too
+        if read_engine is not engine and read_engine.dialect.name == "sqlite":
+            async with read_engine.begin() as conn:
+                await conn.run_sync(Base.metadata.create_all)
+                await conn.run_sync(add_missing_columns)
     except Exception as e:
         logger.error(f"DB Startup Error: {e}")
 
+    if group_commit_enabled:
+        group_writer.start()
+
+    # Cross-worker alert fan-out when running under serve.py; a no-op otherwise
+    await alert_hub.start()
+
+@app.on_event("shutdown")
+async def shutdown_db():
+    # Flush any queued group-commit writes before the process exits
+    await group_writer.stop()
+
 # Router registration
 app.include_router(auth.router, prefix=f"{settings.API_V1_STR}/auth", tags=["Authentication"])
 app.include_router(students.router, prefix=f"{settings.API_V1_STR}/students", tags=["Students"])
 app.include_router(risk.router, prefix=f"{settings.API_V1_STR}/risk", tags=["Risk Analysis"])
 app.include_router(mental_health.router, prefix=f"{settings.API_V1_STR}/mental-health", tags=["Mental Health"])
 app.include_router(admin.router, prefix=f"{settings.API_V1_STR}/admin", tags=["Admin Analytics"])
+app.include_router(history.router, prefix=f"{settings.API_V1_STR}/history", tags=["History"])
+app.include_router(alerts.router, prefix=f"{settings.API_V1_STR}/alerts", tags=["Alerts"])
 
 @app.api_route("/", methods=["GET", "HEAD"])
 async def root():
@@ -0,0 +1,217 @@
+import argparse
+import asyncio
+import copy
+import pickle
+import time
+import numpy as np
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.metrics import roc_auc_score
+from core.config import settings
+from ml import registry
+from ml.dataset import synthetic_dataset, load_labeled_history
+
+# Student forests tried during distillation, smallest first
+DISTILL_GRID = [
+    {"n_estimators": n, "max_depth": d, "min_samples_leaf": 5}
+    for n in (10, 20, 40)
+    for d in (4, 6, 8, 10)
+]
+PRUNE_SIZES = (5, 10, 20, 30, 50)
+
+
+def forest_size(model) -> dict:
+    nodes = sum(est.tree_.node_count for est in model.estimators_)
+    leaves = sum(est.tree_.n_leaves for est in model.estimators_)
+    depth = max(est.tree_.max_depth for est in model.estimators_)
+    return {
+        "n_estimators": len(model.estimators_),
+        "max_depth": int(depth),
+        "total_nodes": int(nodes),
+        "total_leaves": int(leaves),
+        "pickled_bytes": len(pickle.dumps(model, protocol=pickle.HIGHEST_PROTOCOL)),
+    }
+
+
+def measure_latency(model, X, repeats: int = 200) -> dict:
+    """Single-row predict and SHAP latency, which is what the API pays per request."""
+    import shap
+
+    model = copy.copy(model)
+    model.n_jobs = 1
+    row = X[:1]
+
+    started = time.perf_counter()
+    for _ in range(repeats):
+        model.predict_proba(row)
+    predict_ms = (time.perf_counter() - started) * 1000 / repeats
+
+    explainer = shap.TreeExplainer(model)
+    shap_repeats = max(1, repeats // 10)
+    started = time.perf_counter()
+    for _ in range(shap_repeats):
+        explainer.shap_values(row)
+    shap_ms = (time.perf_counter() - started) * 1000 / shap_repeats
+
+    return {"predict_ms": round(predict_ms, 4), "shap_ms": round(shap_ms, 4)}
+
+
+def auc_or_none(y, proba):
+    # Undefined when the holdout has a single class, as in train.evaluate
+    return float(roc_auc_score(y, proba)) if len(np.unique(y)) > 1 else None
+
+
+def compare(teacher_proba, model, X, y) -> dict:
+    proba = model.predict_proba(X)[:, 1]
+    drift = np.abs(proba - teacher_proba)
+    return {
+        "auc": auc_or_none(y, proba),
+        "mean_proba_drift": float(drift.mean()),
+        "p95_proba_drift": float(np.percentile(drift, 95)),
+    }
+
+
+def prune_forest(teacher, per_tree, teacher_proba, size: int):
+    """
+    Greedy forward selection of the teacher's own trees, picking at each step
+    the tree that brings the subset average closest to the full forest.
+    per_tree holds each tree's positive-class probabilities, shape (n_trees, n_rows).
+    """
+    chosen, running = [], np.zeros(per_tree.shape[1])
+    remaining = set(range(len(teacher.estimators_)))
+    for step in range(1, size + 1):
+        best = min(
+            remaining,
+            key=lambda i: np.mean(((running * (step - 1) + per_tree[i]) / step - teacher_proba) ** 2)
+        )
+        chosen.append(best)
+        remaining.discard(best)
+        running = (running * (step - 1) + per_tree[best]) / step
+
+    pruned = copy.deepcopy(teacher)
+    pruned.estimators_ = [pruned.estimators_[i] for i in chosen]
+    pruned.n_estimators = len(chosen)
+    return pruned
+
+
+def distill_forest(teacher, X_train, params: dict, augment: int = 4, seed: int = 42):
+    """Fits a smaller forest on the teacher's labels over the training set plus jittered copies."""
+    rng = np.random.RandomState(seed)
+    scale = X_train.std(axis=0) * 0.05
+    X_aug = np.concatenate([X_train] + [X_train + rng.normal(0, scale, X_train.shape) for _ in range(augment)])
+    y_aug = teacher.predict(X_aug)
+
+    student = RandomForestClassifier(random_state=seed, n_jobs=settings.TRAIN_N_JOBS, **params)
+    student.fit(X_aug, y_aug)
+    return student
+
+
+def exclude_rows(X, X_holdout):
+    """Rows of X whose features don't appear in the holdout, so students never train on it."""
+    held = {row.tobytes() for row in np.ascontiguousarray(X_holdout, dtype=np.float64)}
+    keep = [row.tobytes() not in held for row in np.ascontiguousarray(X, dtype=np.float64)]
+    return X[np.array(keep, dtype=bool)]
+
+
+def compact_model(teacher, X_train, X_test, y_test, max_auc_drop: float, max_proba_drift: float) -> tuple:
+    """
+    Returns (compact_model_or_None, report). Candidates are built from
+    X_train and judged on the teacher's own holdout (X_test, y_test); the
+    smallest by total leaves that stays within both tolerances wins. With a
+    single-class holdout the AUC budget can't be checked and nothing is accepted.
+    """
+    teacher_proba = teacher.predict_proba(X_test)[:, 1]
+    teacher_auc = auc_or_none(y_test, teacher_proba)
+
+    candidates = []
+    per_tree = np.stack([est.predict_proba(X_train)[:, 1] for est in teacher.estimators_])
+    train_proba = per_tree.mean(axis=0)
+    for size in PRUNE_SIZES:
+        if size < len(teacher.estimators_):
+            candidates.append((f"prune-{size}", prune_forest(teacher, per_tree, train_proba, size)))
+    for params in DISTILL_GRID:
+        name = f"distill-{params['n_estimators']}x{params['max_depth']}"
+        candidates.append((name, distill_forest(teacher, X_train, params)))
+
+    evaluated, best = [], None
+    for name, model in candidates:
+        scores = compare(teacher_proba, model, X_test, y_test)
+        size = forest_size(model)
+        ok = (
+            teacher_auc is not None
+            and teacher_auc - scores["auc"] <= max_auc_drop
+            and scores["mean_proba_drift"] <= max_proba_drift
+        )
+        evaluated.append({"candidate": name, "accepted": ok, **scores, **size})
+        if ok and (best is None or size["total_leaves"] < best[2]):
+            best = (name, model, size["total_leaves"])
+
+    report = {
+        "tolerance": {"max_auc_drop": max_auc_drop, "max_proba_drift": max_proba_drift},
+        "holdout_rows": int(len(y_test)),
+        "original": {"auc": teacher_auc, **forest_size(teacher), **measure_latency(teacher, X_test)},
+        "candidates": evaluated,
+        "selected": None,
+    }
+    if best is None:
+        return None, report
+
+    name, model, _ = best
+    model.n_jobs = 1
+    report["selected"] = {
+        "candidate": name,
+        **compare(teacher_proba, model, X_test, y_test),
+        **forest_size(model),
+        **measure_latency(model, X_test),
+    }
+    return model, report
+
+
+async def _load_data(source: str):
+    if source == "synthetic":
+        return synthetic_dataset()
+    from db.database import engine
+    return await load_labeled_history(engine, settings.TRAIN_CHUNK_SIZE)
+
+
+def run(version: str = None, source: str = "database") -> dict:
+    teacher, version = registry.load_model(version)
+    if teacher is None:
+        raise SystemExit("No model version to compact; train one first.")
+
+    # Re-splitting today's data would put the teacher's own training rows in the holdout
+    holdout = registry.read_companion(version, registry.HOLDOUT_FILE)
+    if holdout is None:
+        raise SystemExit(f"Model {version} has no recorded holdout; retrain it before compacting.")
+    X, _ = asyncio.run(_load_data(source))
+    X_train = exclude_rows(X, holdout["X"])
+    if len(X_train) == 0:
+        raise SystemExit(f"No {source} rows outside the holdout of {version} to build candidates from.")
+    model, report = compact_model(
+        teacher, X_train, holdout["X"], holdout["y"],
+        settings.COMPACT_MAX_AUC_DROP, settings.COMPACT_MAX_PROBA_DRIFT
+    )
+    report["version"] = version
+    report["source"] = source
+    registry.write_companion(version, "compaction.json", report, as_json=True)
+
+    if model is None:
+        print(f"No candidate met the tolerance for {version}; original model kept.")
+        return report
+
+    registry.write_companion(version, registry.COMPACT_MODEL_FILE, model)
+    original, selected = report["original"], report["selected"]
+    print(
+        f"Compacted {version} with {selected['candidate']}: "
+        f"{original['total_leaves']} -> {selected['total_leaves']} leaves, "
+        f"SHAP {original['shap_ms']:.2f}ms -> {selected['shap_ms']:.2f}ms, "
+        f"AUC {original['auc']:.3f} -> {selected['auc']:.3f}"
+    )
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Distill a registered forest into a smaller ensemble.")
+    parser.add_argument("--version", help="Model version to compact (defaults to CURRENT)")
+    parser.add_argument("--source", choices=["database", "synthetic"], default="database")
+    args = parser.parse_args()
+    run(args.version, args.source)
@@ -0,0 +1,88 @@
+import numpy as np
+import pandas as pd
+from sqlalchemy import func, select
+
+FEATURE_NAMES = ['attendance_rate', 'gpa', 'financial_stress_score', 'family_support_score']
+
+# Predictions at or above this level are treated as positive (dropout) labels
+POSITIVE_LEVELS = ("High", "Critical")
+
+
+def synthetic_dataset(n_samples: int = 1000, seed: int = 42):
+    """Rule-labelled synthetic cohort used when no real history is available."""
+    rng = np.random.RandomState(seed)
+    df = pd.DataFrame({
+        'attendance_rate': rng.uniform(20, 100, n_samples),
+        'gpa': rng.uniform(0, 4, n_samples),
+        'financial_stress_score': rng.uniform(0, 1, n_samples),
+        'family_support_score': rng.uniform(0, 1, n_samples)
+    })
+
+    # High dropout if low attendance, low gpa, high financial stress, low support
+    risk_score = (
+        (100 - df['attendance_rate']) * 0.4 +
+        (4 - df['gpa']) * 10 +
+        df['financial_stress_score'] * 20 +
+        (1 - df['family_support_score']) * 20
+    )
+    y = (risk_score > 40).astype(int).to_numpy()
+    return df[FEATURE_NAMES].to_numpy(dtype=np.float64), y
+
+
+async def stream_labeled_history(engine, chunk_size: int = 5000):
+    """
+    Yields (X, y) numpy chunks of student features labelled with each
+    student's latest risk prediction. Rows are pulled through a server-side
+    cursor so only one chunk is materialised at a time.
+
+    One row per student: features are the student's current values, so one
+    row per stored prediction would repeat identical rows and put copies of
+    them on both sides of the train/holdout split.
+    """
+    from db import models
+
+    p = models.RiskPrediction
+    # One pass over predictions ranks each student's newest labelled row first
+    ranked = (
+        select(
+            p.student_id,
+            p.risk_level,
+            func.row_number().over(
+                partition_by=p.student_id, order_by=(p.created_at.desc(), p.id.desc())
+            ).label("rank"),
+        )
+        .where(p.risk_level.isnot(None))
+        .subquery()
+    )
+    stmt = (
+        select(
+            models.Student.attendance_rate,
+            models.Student.gpa,
+            models.Student.financial_stress_score,
+            models.Student.family_support_score,
+            ranked.c.risk_level,
+        )
+        .join(ranked, ranked.c.student_id == models.Student.id)
+        .where(ranked.c.rank == 1)
+        .execution_options(yield_per=chunk_size)
+    )
+
+    async with engine.connect() as conn:
+        result = await conn.stream(stmt)
+        async for rows in result.partitions(chunk_size):
+            X = np.array([row[:4] for row in rows], dtype=np.float64)
+            y = np.fromiter((row[4] in POSITIVE_LEVELS for row in rows), dtype=np.int64, count=len(rows))
+            # Drop rows with missing features rather than imputing
+            mask = ~np.isnan(X).any(axis=1)
+            yield X[mask], y[mask]
+
+
+async def load_labeled_history(engine, chunk_size: int = 5000):
+    X_parts, y_parts = [], []
+    async for X, y in stream_labeled_history(engine, chunk_size):
+        X_parts.append(X)
+        y_parts.append(y)
+
+    if not X_parts:
+        return np.empty((0, len(FEATURE_NAMES))), np.empty(0, dtype=np.int64)
+    return np.concatenate(X_parts), np.concatenate(y_parts)
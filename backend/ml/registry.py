@@ -0,0 +1,138 @@
+import json
+import os
+import pickle
+import shutil
+import tempfile
+from datetime import datetime, timezone
+from core.config import settings
+
+CURRENT_POINTER = "CURRENT"
+MODEL_FILE = "model.pkl"
+COMPACT_MODEL_FILE = "compact.pkl"
+# Holdout split used to gate the version; later evaluations must reuse it
+HOLDOUT_FILE = "holdout.pkl"
+METADATA_FILE = "metadata.json"
+
+
+def _model_dir() -> str:
+    os.makedirs(settings.MODEL_DIR, exist_ok=True)
+    return settings.MODEL_DIR
+
+
+def new_version() -> str:
+    return datetime.now(timezone.utc).strftime("v%Y%m%d%H%M%S%f")
+
+
+def version_path(version: str) -> str:
+    return os.path.join(_model_dir(), version)
+
+
+def write_version(version: str, model, metadata: dict) -> str:
+    """
+    Writes model + metadata into a scratch directory and renames it into place,
+    so a version directory is either complete or absent.
+    """
+    root = _model_dir()
+    final_path = os.path.join(root, version)
+    tmp_path = tempfile.mkdtemp(prefix=f".{version}-", dir=root)
+    try:
+        with open(os.path.join(tmp_path, MODEL_FILE), 'wb') as f:
+            pickle.dump(model, f, protocol=pickle.HIGHEST_PROTOCOL)
+            f.flush()
+            os.fsync(f.fileno())
+
+        metadata = dict(metadata)
+        metadata["version"] = version
+        metadata["artifact_bytes"] = os.path.getsize(os.path.join(tmp_path, MODEL_FILE))
+        with open(os.path.join(tmp_path, METADATA_FILE), 'w') as f:
+            json.dump(metadata, f, indent=2)
+
+        os.rename(tmp_path, final_path)
+    except Exception:
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        raise
+    return final_path
+
+
+def write_companion(version: str, filename: str, payload, as_json: bool = False) -> str:
+    """Adds a derived artifact (e.g. a compacted model or report) to an existing version."""
+    path = os.path.join(version_path(version), filename)
+    tmp = f"{path}.tmp"
+    if as_json:
+        with open(tmp, 'w') as f:
+            json.dump(payload, f, indent=2)
+    else:
+        with open(tmp, 'wb') as f:
+            pickle.dump(payload, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp, path)
+    return path
+
+
+def read_companion(version: str, filename: str):
+    """A pickled companion artifact, or None if the version has none."""
+    path = os.path.join(version_path(version), filename)
+    if not os.path.exists(path):
+        return None
+    with open(path, 'rb') as f:
+        return pickle.load(f)
+
+
+def update_metadata(version: str, **fields) -> dict:
+    path = os.path.join(version_path(version), METADATA_FILE)
+    metadata = read_metadata(version)
+    metadata.update(fields)
+    tmp = f"{path}.tmp"
+    with open(tmp, 'w') as f:
+        json.dump(metadata, f, indent=2)
+    os.replace(tmp, path)
+    return metadata
+
+
+def promote(version: str) -> None:
+    """Atomically points CURRENT at an already written version."""
+    if not os.path.isdir(version_path(version)):
+        raise FileNotFoundError(f"Model version {version} does not exist")
+    pointer = os.path.join(_model_dir(), CURRENT_POINTER)
+    tmp = f"{pointer}.tmp"
+    with open(tmp, 'w') as f:
+        f.write(version)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, pointer)
+
+
+def current_version():
+    pointer = os.path.join(_model_dir(), CURRENT_POINTER)
+    if not os.path.exists(pointer):
+        return None
+    with open(pointer) as f:
+        return f.read().strip() or None
+
+
+def read_metadata(version: str) -> dict:
+    with open(os.path.join(version_path(version), METADATA_FILE)) as f:
+        return json.load(f)
+
+
+def load_model(version: str = None, compact: bool = False):
+    """
+    Returns (model, version) for the requested or current version, or (None, None).
+    With compact=True the compacted artifact is preferred when one exists.
+    """
+    version = version or current_version()
+    if not version:
+        return None, None
+    path = os.path.join(version_path(version), MODEL_FILE)
+    compact_path = os.path.join(version_path(version), COMPACT_MODEL_FILE)
+    if compact and os.path.exists(compact_path):
+        path = compact_path
+    with open(path, 'rb') as f:
+        return pickle.load(f), version
+
+
+def list_versions() -> list:
+    root = _model_dir()
+    return sorted(
+        name for name in os.listdir(root)
+        if not name.startswith(".") and os.path.isdir(os.path.join(root, name))
+    )
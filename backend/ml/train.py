@@ -1,8 +1,18 @@
 import pandas as pd
 import numpy as np
 from sklearn.ensemble import RandomForestClassifier
+from sklearn.metrics import accuracy_score, roc_auc_score
+from sklearn.model_selection import train_test_split
+import argparse
+import asyncio
 import pickle
 import os
+import resource
+import time
+import tracemalloc
+from core.config import settings
+from ml import registry
+from ml.dataset import FEATURE_NAMES, synthetic_dataset, load_labeled_history
 
 def train_initial_model():
     # Create dummy dataset
@@ -34,5 +44,125 @@ def train_initial_model():
         
     print(f"Model trained and saved to {model_path}")
 
+def build_model(n_jobs: int = -1) -> RandomForestClassifier:
+    return RandomForestClassifier(n_estimators=100, random_state=42, n_jobs=n_jobs)
+
+def evaluate(model, X, y) -> dict:
+    proba = model.predict_proba(X)[:, 1]
+    return {
+        "auc": float(roc_auc_score(y, proba)) if len(np.unique(y)) > 1 else None,
+        "accuracy": float(accuracy_score(y, (proba >= 0.5).astype(int))),
+        "holdout_rows": int(len(y)),
+    }
+
+def check_quality_gates(metrics: dict, n_rows: int, baseline_auc=None) -> list:
+    """Returns the list of failed gates; an empty list means the model may be promoted."""
+    failures = []
+    if n_rows < settings.TRAIN_MIN_ROWS:
+        failures.append(f"only {n_rows} labelled rows (minimum {settings.TRAIN_MIN_ROWS})")
+    if metrics["auc"] is None:
+        failures.append("holdout contains a single class, AUC undefined")
+    elif metrics["auc"] < settings.PROMOTE_MIN_AUC:
+        failures.append(f"holdout AUC {metrics['auc']:.3f} below {settings.PROMOTE_MIN_AUC}")
+    elif baseline_auc is not None and metrics["auc"] < baseline_auc - settings.PROMOTE_MAX_AUC_REGRESSION:
+        failures.append(f"holdout AUC {metrics['auc']:.3f} regresses current model ({baseline_auc:.3f})")
+    return failures
+
+def fit_and_register(X, y, source: str, promote: bool = True) -> dict:
+    """
+    Fits a forest on (X, y), evaluates it on a stratified holdout, writes a
+    versioned artifact and promotes it only if the quality gates pass.
+    """
+    stratify = y if len(np.unique(y)) > 1 else None
+    X_train, X_test, y_train, y_test = train_test_split(
+        X, y, test_size=settings.TRAIN_HOLDOUT_FRACTION, random_state=42, stratify=stratify
+    )
+
+    tracemalloc.start()
+    started = time.perf_counter()
+    model = build_model(settings.TRAIN_N_JOBS)
+    model.fit(X_train, y_train)
+    fit_seconds = time.perf_counter() - started
+    _, peak_bytes = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    metrics = evaluate(model, X_test, y_test)
+
+    # The incoming model must also hold up against the currently promoted one
+    baseline_auc = None
+    current_model, current_version = registry.load_model()
+    if current_model is not None and metrics["auc"] is not None:
+        baseline_auc = evaluate(current_model, X_test, y_test)["auc"]
+
+    failures = check_quality_gates(metrics, len(y), baseline_auc)
+    version = registry.new_version()
+    metadata = {
+        "source": source,
+        "feature_names": FEATURE_NAMES,
+        "rows": int(len(y)),
+        "positive_rate": float(np.mean(y)) if len(y) else 0.0,
+        "metrics": metrics,
+        "baseline_version": current_version,
+        "baseline_auc": baseline_auc,
+        "fit_seconds": round(fit_seconds, 3),
+        "peak_traced_bytes": int(peak_bytes),
+        # ru_maxrss is reported in KiB on Linux
+        "process_max_rss_bytes": int(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss) * 1024,
+        "gate_failures": failures,
+        "promoted": False,
+    }
+    registry.write_version(version, model, metadata)
+    registry.write_companion(version, registry.HOLDOUT_FILE, {"X": X_test, "y": y_test})
+
+    if promote and not failures:
+        registry.promote(version)
+        metadata = registry.update_metadata(version, promoted=True)
+        print(f"Model {version} promoted (AUC {metrics['auc']:.3f})")
+    else:
+        metadata = registry.read_metadata(version)
+        print(f"Model {version} written but not promoted: {failures or 'promotion disabled'}")
+    return metadata
+
+async def train_from_database(promote: bool = True) -> dict:
+    from db.database import engine
+
+    started = time.perf_counter()
+    X, y = await load_labeled_history(engine, settings.TRAIN_CHUNK_SIZE)
+    load_seconds = time.perf_counter() - started
+    print(f"Loaded {len(y)} labelled rows in {load_seconds:.2f}s")
+
+    metadata = fit_and_register(X, y, source="database", promote=promote)
+    return registry.update_metadata(metadata["version"], load_seconds=round(load_seconds, 3))
+
+def train_synthetic(promote: bool = True) -> dict:
+    X, y = synthetic_dataset()
+    return fit_and_register(X, y, source="synthetic", promote=promote)
+
+def print_version_costs():
+    current = registry.current_version()
+    print(f"{'version':<26}{'rows':>10}{'fit_s':>10}{'peak_MiB':>10}{'size_KiB':>10}{'auc':>8}")
+    for version in registry.list_versions():
+        meta = registry.read_metadata(version)
+        auc = meta["metrics"]["auc"]
+        marker = " *" if version == current else ""
+        print(
+            f"{version:<26}{meta['rows']:>10}{meta['fit_seconds']:>10.2f}"
+            f"{meta['peak_traced_bytes'] / 2**20:>10.1f}{meta['artifact_bytes'] / 1024:>10.1f}"
+            f"{(auc if auc is not None else float('nan')):>8.3f}{marker}"
+        )
+
 if __name__ == "__main__":
-    train_initial_model()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Train and register a dropout risk model.")
+    parser.add_argument("--source", choices=["database", "synthetic", "legacy"], default="database")
+    parser.add_argument("--no-promote", action="store_true", help="Write the version without promoting it")
+    parser.add_argument("--list", action="store_true", help="Print training cost per registered version")
+    args = parser.parse_args()
+
+    if args.list:
+        print_version_costs()
+    elif args.source == "legacy":
+        train_initial_model()
+    elif args.source == "synthetic":
+        train_synthetic(promote=not args.no_promote)
+    else:
+        asyncio.run(train_from_database(promote=not args.no_promote))
@@ -1,19 +1,35 @@
 
-from fastapi import APIRouter, Depends
+from datetime import datetime
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 from sqlalchemy import func
-from db.database import get_db
-from db import models
-from core.dependencies import get_current_admin
+from db.database import get_db, get_pool_metrics
+from db import models, schemas
+from db.group_commit import group_writer
+from core.config import settings
+from core.dependencies import get_current_admin, get_tenant_read_db
+from core.admission import admission_snapshot
+from core.tenant_cache import make_tenant_cache, tenant_cache_snapshot
+from services.export_service import FORMATS, stream_export
+from services.bias_audit import bias_audit_engine
 
 router = APIRouter()
 
+analytics_cache = make_tenant_cache("analytics", ttl=settings.ANALYTICS_CACHE_TTL, max_entries=1)
+
 @router.get("/analytics")
 async def get_analytics(
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_tenant_read_db),
     admin: models.User = Depends(get_current_admin)
 ):
+    # Counts are scoped to the admin's institution, and cached in that institution's namespace
+    cached = analytics_cache.get(admin.institution_id, "summary")
+    if cached is not None:
+        return cached
+
     # Count students
     result_s = await db.execute(select(func.count(models.Student.id)))
     total_students = result_s.scalar()
@@ -26,31 +42,98 @@ async def get_analytics(
     result_c = await db.execute(select(func.count(models.MentalHealthLog.id)).filter(models.MentalHealthLog.crisis_flag == True))
     crisis_count = result_c.scalar()
     
-    return {
+    summary = {
         "total_students": total_students or 0,
         "critical_risk_cases": critical_cases or 0,
         "crisis_alerts_today": crisis_count or 0,
         "system_health": "Optimal"
     }
+    analytics_cache.set(admin.institution_id, "summary", summary)
+    return summary
+
+USER_ROLES = ("student", "counselor", "admin")
+
+@router.patch("/users/{user_id}", response_model=schemas.UserAccess)
+async def assign_user(
+    user_id: str,
+    assignment: schemas.UserAssignment,
+    db: AsyncSession = Depends(get_db),
+    admin: models.User = Depends(get_current_admin)
+):
+    """
+    Sets a user's role and institution. Self-registered users start without an
+    institution and cannot read tenant data until assigned here. Institution
+    admins can only claim unassigned users into, or manage users of, their own
+    institution; platform admins can assign anyone anywhere.
+    """
+    changes = assignment.model_dump(exclude_unset=True)
+    if "role" in changes and changes["role"] not in USER_ROLES:
+        raise HTTPException(status_code=400, detail=f"role must be one of {list(USER_ROLES)}")
+    user = await db.get(models.User, user_id)
+    if admin.institution_id is not None:
+        platform_admin = user is not None and user.role == "admin" and user.institution_id is None
+        if user is None or platform_admin or user.institution_id not in (None, admin.institution_id):
+            raise HTTPException(status_code=404, detail="User not found")
+        changes["institution_id"] = admin.institution_id
+    elif user is None:
+        raise HTTPException(status_code=404, detail="User not found")
+    for field, value in changes.items():
+        setattr(user, field, value)
+    db.add(models.AuditLog(user_id=admin.id, action=f"Assigned user {user_id}: {changes}"))
+    await db.commit()
+    await db.refresh(user)
+    return user
+
+@router.get("/db-pools")
+async def get_db_pools(admin: models.User = Depends(get_current_admin)):
+    """Connection pool, read/write routing and group-commit counters for this process."""
+    metrics = get_pool_metrics()
+    metrics["group_commit"] = dict(group_writer.stats)
+    return metrics
+
+@router.get("/admission")
+async def get_admission(admin: models.User = Depends(get_current_admin)):
+    """Current limits, queue depth and rejection counts per route class."""
+    return admission_snapshot()
+
+@router.get("/caches")
+async def get_caches(admin: models.User = Depends(get_current_admin)):
+    """Occupancy, hit and eviction counts of the per-institution caches."""
+    return tenant_cache_snapshot()
+
+@router.get("/export/predictions")
+async def export_predictions(
+    format: str = "parquet",
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    institution_id: Optional[str] = None,
+    risk_level: Optional[str] = None,
+    admin: models.User = Depends(get_current_admin)
+):
+    """
+    Streams every matching prediction, archived ones included, with SHAP values
+    flattened to shap_<feature> columns.
+    """
+    # The export reads outside the request session, so institution admins are pinned here
+    if admin.institution_id is not None:
+        institution_id = admin.institution_id
+    if format not in FORMATS:
+        raise HTTPException(status_code=400, detail=f"format must be one of {sorted(FORMATS)}")
+    media_type, extension = FORMATS[format]
+    return StreamingResponse(
+        stream_export(format, start=start, end=end, institution_id=institution_id, risk_level=risk_level),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="risk_predictions.{extension}"'}
+    )
 
 @router.get("/bias-audit")
 async def get_bias_audit(
-    db: AsyncSession = Depends(get_db),
     admin: models.User = Depends(get_current_admin)
 ):
     """
-    Simulates a bias audit by calculating variance in risk flagging across demographics.
-    In a full implementation, this would query the full student and risk table.
+    Flag-rate parity and score variance across student groups, computed over each
+    student's latest prediction. Results are cached per model version and data
+    watermark; only students re-scored since the last audit are reprocessed.
+    Institution admins get their own institution's audit.
     """
-    return {
-        "gender_variance": 0.08,
-        "ses_variance": 0.12,
-        "location_variance": 0.04,
-        "overall_bias_score": 92,
-        "demographic_parity_diff": 0.05,
-        "recommendations": [
-            "Monitor rural student engagement more closely",
-            "Adjust baseline expectations for students with low family support scores",
-            "Periodic re-training of ML model to include diverse training samples"
-        ]
-    }
+    return await bias_audit_engine.run(admin.institution_id)
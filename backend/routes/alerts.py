@@ -0,0 +1,77 @@
+import asyncio
+import json
+from datetime import timedelta
+from typing import Optional
+from fastapi import APIRouter, Depends, Header, HTTPException, Request
+from fastapi.responses import StreamingResponse
+from db import models
+from core import security
+from core.config import settings
+from core.dependencies import STREAM_TICKET_SCOPE, get_current_user, get_stream_user, tenant_scope
+from services.alert_hub import alert_hub
+
+router = APIRouter()
+
+def format_event(event: dict) -> str:
+    return f"id: {event['id']}\nevent: {event['type']}\ndata: {json.dumps(event)}\n\n"
+
+@router.post("/ticket")
+async def issue_stream_ticket(current_user: models.User = Depends(get_current_user)):
+    """
+    Short-lived credential for GET /stream?ticket=. EventSource cannot send the
+    bearer header, and a ticket that leaks through access logs expires quickly
+    and opens nothing but the stream. Clients fetch a fresh one to reconnect.
+    """
+    if current_user.role not in ("admin", "counselor"):
+        raise HTTPException(status_code=403, detail="Not enough permissions")
+    tenant_scope(current_user)
+    ticket = security.create_access_token(
+        current_user.id,
+        expires_delta=timedelta(seconds=settings.ALERT_STREAM_TICKET_SECONDS),
+        scope=STREAM_TICKET_SCOPE
+    )
+    return {"ticket": ticket, "expires_in": settings.ALERT_STREAM_TICKET_SECONDS}
+
+@router.get("/stream")
+async def stream_alerts(
+    request: Request,
+    last_event_id: Optional[str] = Header(None),
+    current_user: models.User = Depends(get_stream_user)
+):
+    """
+    Server-Sent Events feed of crisis and critical-risk alerts for the caller's
+    institution. Reconnecting clients send Last-Event-ID to resume.
+    """
+    try:
+        resume_from = int(last_event_id) if last_event_id else None
+    except ValueError:
+        resume_from = None
+    # Only platform admins (no institution) see every tenant; counselors must belong to one
+    institution_id = tenant_scope(current_user)
+    subscriber = alert_hub.subscribe(institution_id, resume_from, all_institutions=institution_id is None)
+
+    async def event_stream():
+        try:
+            # Tell EventSource how long to wait before reconnecting
+            yield "retry: 3000\n\n"
+            while True:
+                try:
+                    event = await asyncio.wait_for(subscriber.queue.get(), settings.ALERT_HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    if subscriber.dropped or await request.is_disconnected():
+                        break
+                    yield ": heartbeat\n\n"
+                    continue
+                yield format_event(event)
+                if subscriber.dropped and subscriber.queue.empty():
+                    # Too slow to keep up; the client resumes from its last id on reconnect
+                    yield "event: dropped\ndata: {}\n\n"
+                    break
+        finally:
+            alert_hub.unsubscribe(subscriber)
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
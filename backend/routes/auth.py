@@ -7,11 +7,16 @@ from core import security
 
 router = APIRouter()
 
+# Admin rights and institution membership are granted through PATCH /admin/users/{id}
+SELF_SERVICE_ROLES = ("student", "counselor")
+
 @router.post("/register", response_model=schemas.Token)
 async def register(user_in: schemas.UserCreate, db: AsyncSession = Depends(get_db)):
     result = await db.execute(select(models.User).filter(models.User.email == user_in.email))
     if result.scalars().first():
         raise HTTPException(status_code=400, detail="Email already registered")
+    if user_in.role not in SELF_SERVICE_ROLES:
+        raise HTTPException(status_code=403, detail="Admin accounts are created by an existing admin")
     
     hashed_password = security.get_password_hash(user_in.password)
     new_user = models.User(
@@ -1,28 +1,52 @@
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
-from database import get_db
-from models import RiskPrediction
+from db import models
+from core.dependencies import get_current_user, get_tenant_read_db
+from services.archive_service import read_archived
 from typing import List
 import numpy as np
 
 router = APIRouter()
 
+HISTORY_LIMIT = 30
+
 @router.get("/risk-history")
-async def get_risk_history(student_id: str, db: AsyncSession = Depends(get_db)):
+async def get_risk_history(
+    student_id: str,
+    include_archived: bool = False,
+    db: AsyncSession = Depends(get_tenant_read_db),
+    current_user: models.User = Depends(get_current_user)
+):
     try:
-        query = select(RiskPrediction).where(RiskPrediction.student_id == student_id).order_by(RiskPrediction.created_at.desc()).limit(30)
+        query = select(models.RiskPrediction).where(models.RiskPrediction.student_id == student_id).order_by(models.RiskPrediction.created_at.desc()).limit(HISTORY_LIMIT)
         result = await db.execute(query)
         predictions = result.scalars().all()
         
         history_list = [
             {
                 "id": p.id,
-                "probability": p.dropout_probability,
+                "probability": p.risk_score,
                 "risk_level": p.risk_level,
                 "timestamp": p.created_at
             } for p in predictions
         ]
+
+        # Top up from cold storage only when the hot table runs out
+        # The archive is read outside the scoped session, so confirm the student is visible first
+        if include_archived and len(history_list) < HISTORY_LIMIT and await db.get(models.Student, student_id):
+            oldest = history_list[-1]["timestamp"] if history_list else None
+            seen = {h["id"] for h in history_list}
+            archived = await read_archived("risk_predictions", student_id, end=oldest, limit=HISTORY_LIMIT)
+            history_list += [
+                {
+                    "id": a["id"],
+                    "probability": a["risk_score"],
+                    "risk_level": a["risk_level"],
+                    "timestamp": a["created_at"],
+                    "archived": True
+                } for a in archived if a["id"] not in seen
+            ][:HISTORY_LIMIT - len(history_list)]
         
         # Calculate trend direction
         trend = "STABLE"
@@ -1,8 +1,8 @@
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.ext.asyncio import AsyncSession
-from db.database import get_db
+from db.group_commit import persist
 from db import models, schemas
-from core.dependencies import get_current_user
+from core.dependencies import get_current_user, get_tenant_db
 from services.gemini_service import gemini_service
 from services.alert_service import alert_service
 
@@ -12,26 +12,35 @@ router = APIRouter()
 async def log_mental_health(
     student_id: str,
     log_in: schemas.MentalHealthLogCreate,
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_tenant_db),
     current_user: models.User = Depends(get_current_user)
 ):
+    # Scoped lookup: a student from another institution is a 404, and the log inherits its tenant key
+    student = await db.get(models.Student, student_id)
+    if not student:
+        raise HTTPException(status_code=404, detail="Student not found")
+
     # 1. AI Analysis
     analysis = await gemini_service.analyze_log(log_in.text_entry)
     
     # 2. Persist
     new_log = models.MentalHealthLog(
         student_id=student_id,
+        institution_id=student.institution_id,
         text_entry=log_in.text_entry,
         sentiment_score=analysis['sentiment_score'],
         crisis_flag=analysis['crisis_flag']
     )
-    db.add(new_log)
     
     # 3. Emergency Alert
     if analysis['crisis_flag']:
-        # In a real app we'd fetch the student name
-        alert_service.trigger_crisis_alert("Student " + student_id)
+        # Subscribers are filtered by the student's institution
+        alert_service.trigger_crisis_alert(
+            student.name,
+            student_id=student_id,
+            institution_id=student.institution_id
+        )
     
-    await db.commit()
-    await db.refresh(new_log)
+    # Defaults such as created_at are populated at flush, so no refresh is needed
+    await persist(db, [new_log])
     return new_log
\ No newline at end of file
@@ -1,26 +1,35 @@
-from fastapi import APIRouter, Depends, HTTPException
+from typing import List, Optional
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException
 from sqlalchemy.ext.asyncio import AsyncSession
-from db.database import get_db
+from sqlalchemy.future import select
+from db.group_commit import persist
 from db import models, schemas
-from core.dependencies import get_current_user
+from core.config import settings
+from core.dependencies import get_current_user, get_tenant_db, get_tenant_read_db
+from core.responses import rows_response
 from services.risk_engine import risk_engine
+from services.explanation_service import explanation_service
+from services.ml_service import ml_service
+from services.risk_projection import upsert_current
 
 router = APIRouter()
 
 @router.post("/predict/{student_id}", response_model=schemas.RiskPredictionResponse)
 async def predict_risk(
     student_id: str,
-    db: AsyncSession = Depends(get_db),
+    background_tasks: BackgroundTasks,
+    db: AsyncSession = Depends(get_tenant_db),
     current_user: models.User = Depends(get_current_user)
 ):
-    # Fetch student
-    from sqlalchemy.future import select
+    # Fetch student; other institutions' students are invisible to a scoped session
     result = await db.execute(select(models.Student).filter(models.Student.id == student_id))
     student = result.scalars().first()
     if not student:
         raise HTTPException(status_code=404, detail="Student not found")
 
     student_data = {
+        "student_id": student.id,
+        "institution_id": student.institution_id,
         "name": student.name,
         "attendance_rate": student.attendance_rate,
         "gpa": student.gpa,
@@ -28,20 +37,74 @@ async def predict_risk(
         "family_support_score": student.family_support_score
     }
 
-    assessment = await risk_engine.assess_student(student_data)
+    explain_now = settings.SHAP_MODE == "eager"
+    assessment = await risk_engine.assess_student(student_data, explain=explain_now)
     
     # Save prediction history
     new_pred = models.RiskPrediction(
         student_id=student_id,
+        institution_id=student.institution_id,
         risk_score=assessment['risk_score'],
         risk_level=assessment['risk_level'],
-        shap_values=assessment['shap_values']
+        model_version=assessment['model_version'],
+        features={f: student_data[f] for f in ml_service.feature_names},
+        shap_values=assessment['shap_values'],
+        explanation_status="ready" if explain_now else "pending"
     )
-    db.add(new_pred)
     
     # Audit log
     audit = models.AuditLog(user_id=current_user.id, action=f"Risk prediction for student {student_id}")
-    db.add(audit)
     
-    await db.commit()
-    return assessment
\ No newline at end of file
+    await persist(
+        db, [new_pred, audit],
+        after_flush=lambda session: upsert_current(session, new_pred, student.institution_id)
+    )
+
+    # In "lazy" mode the explanation is only computed when someone reads it
+    if settings.SHAP_MODE == "deferred":
+        background_tasks.add_task(explanation_service.explain_in_background, new_pred.id)
+
+    assessment['prediction_id'] = new_pred.id
+    assessment['explanation_status'] = new_pred.explanation_status
+    return assessment
+
+@router.get("/explanations/{prediction_id}", response_model=schemas.ExplanationResponse)
+async def get_explanation(
+    prediction_id: str,
+    db: AsyncSession = Depends(get_tenant_db),
+    current_user: models.User = Depends(get_current_user)
+):
+    prediction = await db.get(models.RiskPrediction, prediction_id)
+    if not prediction:
+        raise HTTPException(status_code=404, detail="Prediction not found")
+
+    prediction = await explanation_service.explain_prediction(db, prediction)
+    return {
+        "prediction_id": prediction.id,
+        "explanation_status": prediction.explanation_status,
+        "shap_values": prediction.shap_values
+    }
+
+@router.get("/current", response_model=List[schemas.StudentRiskCurrent])
+async def list_current_risk(
+    institution_id: Optional[str] = None,
+    risk_level: Optional[str] = None,
+    skip: int = 0,
+    limit: int = 100,
+    db: AsyncSession = Depends(get_tenant_read_db),
+    current_user: models.User = Depends(get_current_user)
+):
+    """
+    Latest risk per student, highest score first, served from the student_risk_current
+    projection. Scoped users only ever see their own institution.
+    """
+    current = models.StudentRiskCurrent
+    # Only the response's columns, serialised straight from the row tuples. ORM attributes
+    # rather than table columns, so the session's tenant filter applies
+    query = select(*(getattr(current, name) for name in schemas.StudentRiskCurrent.model_fields))
+    if institution_id is not None:
+        query = query.filter(current.institution_id == institution_id)
+    if risk_level is not None:
+        query = query.filter(current.risk_level == risk_level)
+    result = await db.execute(query.order_by(current.risk_score.desc()).offset(skip).limit(limit))
+    return rows_response(result)
@@ -2,28 +2,42 @@ from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 from typing import List
-from db.database import get_db
 from db import models, schemas
-from core.dependencies import get_current_user
+from core.dependencies import get_current_user, get_tenant_db, get_tenant_read_db
+from core.responses import rows_response
 
 router = APIRouter()
 
+# Column order matches schemas.Student so rows can be serialised without building ORM objects
+STUDENT_COLUMNS = (
+    models.Student.id,
+    models.Student.name,
+    models.Student.institution_id,
+    models.Student.age,
+    models.Student.attendance_rate,
+    models.Student.gpa,
+    models.Student.financial_stress_score,
+    models.Student.family_support_score,
+    models.Student.created_at,
+)
+
 @router.get("/", response_model=List[schemas.Student])
 async def read_students(
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_tenant_read_db),
     skip: int = 0,
     limit: int = 100,
     current_user: models.User = Depends(get_current_user)
 ):
-    result = await db.execute(select(models.Student).offset(skip).limit(limit))
-    return result.scalars().all()
+    result = await db.execute(select(*STUDENT_COLUMNS).offset(skip).limit(limit))
+    return rows_response(result)
 
 @router.post("/", response_model=schemas.Student)
 async def create_student(
     student_in: schemas.StudentCreate,
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_tenant_db),
     current_user: models.User = Depends(get_current_user)
 ):
+    # Scoped sessions stamp the caller's institution over whatever the body says
     new_student = models.Student(**student_in.dict())
     db.add(new_student)
     await db.commit()
@@ -33,7 +47,7 @@ async def create_student(
 @router.get("/{student_id}", response_model=schemas.Student)
 async def read_student(
     student_id: str,
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_tenant_read_db),
     current_user: models.User = Depends(get_current_user)
 ):
     result = await db.execute(select(models.Student).filter(models.Student.id == student_id))
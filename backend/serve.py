@@ -0,0 +1,356 @@
+"""
+Pre-fork production server.
+
+The parent imports the app once, which builds the model and SHAP explainer,
+then forks WEB_CONCURRENCY uvicorn workers that share those pages
+copy-on-write. The forest's node arrays are contiguous C buffers that
+inference never writes to, and gc.freeze() keeps the collector from touching
+the parent's object headers, so the model stays shared across workers.
+
+When the registry's CURRENT model version changes (or on SIGHUP) the parent
+reloads the model and replaces workers one at a time.
+
+The parent also relays real-time alerts between workers (AlertRelay), so an
+SSE subscriber sees events published by any worker.
+"""
+import gc
+import itertools
+import json
+import logging
+import os
+import select
+import signal
+import socket
+import sys
+import time
+from collections import deque
+import uvicorn
+from core.config import settings
+
+logger = logging.getLogger("serve")
+
+def _split_budget(budget: int, workers: int) -> tuple:
+    """(pool_size, max_overflow) per worker so that all workers together stay within budget."""
+    per_worker = max(1, budget // workers)
+    pool_size = max(1, (per_worker * 2) // 3)
+    return pool_size, per_worker - pool_size
+
+def size_db_pool(workers: int) -> None:
+    """
+    Splits the total connection budget across workers before the engines are
+    created. With a read replica the budget is shared between the primary and
+    replica pools, so DB_MAX_CONNECTIONS bounds every connection the server opens.
+    """
+    budget = settings.DB_MAX_CONNECTIONS
+    pools = 2 if settings.DATABASE_READ_URL else 1
+    if budget < workers * pools:
+        logger.warning(f"DB_MAX_CONNECTIONS={budget} is below one connection per pool per worker; it will be exceeded")
+    if settings.DATABASE_READ_URL:
+        read_budget = min(budget - workers, max(workers, int(budget * settings.READ_CONNECTION_SHARE)))
+        budget -= read_budget
+        settings.READ_POOL_SIZE, settings.READ_MAX_OVERFLOW = _split_budget(read_budget, workers)
+        logger.info(
+            f"Replica pool per worker: pool_size={settings.READ_POOL_SIZE} "
+            f"max_overflow={settings.READ_MAX_OVERFLOW} (budget {read_budget})"
+        )
+    settings.DB_POOL_SIZE, settings.DB_MAX_OVERFLOW = _split_budget(budget, workers)
+    logger.info(
+        f"DB pool per worker: pool_size={settings.DB_POOL_SIZE} "
+        f"max_overflow={settings.DB_MAX_OVERFLOW} (budget {budget} of {settings.DB_MAX_CONNECTIONS})"
+    )
+
+def bind_socket(host: str, port: int) -> socket.socket:
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(2048)
+    sock.set_inheritable(True)
+    return sock
+
+class AlertRelay:
+    """
+    Parent side of the cross-worker alert fan-out. Each worker has a socket
+    pair with the parent; events a worker publishes are numbered here and
+    sent to every worker, so subscribers see the same ids and history
+    whichever worker they are connected to. Recent events are replayed to
+    newly spawned workers so Last-Event-ID resume works there too.
+    """
+    # A worker that stops reading loses events beyond this rather than growing the parent
+    MAX_PENDING_BYTES = 4 * 2**20
+
+    def __init__(self, history_size: int):
+        self.channels = {}
+        self._inbound = {}
+        self._outbound = {}
+        self._history = deque(maxlen=history_size)
+        self._ids = itertools.count(int(time.time() * 1000))
+
+    def add(self, pid: int, sock: socket.socket) -> None:
+        sock.setblocking(False)
+        self.channels[pid] = sock
+        self._inbound[pid] = bytearray()
+        self._outbound[pid] = bytearray(b"".join(self._history))
+
+    def remove(self, pid: int) -> None:
+        sock = self.channels.pop(pid, None)
+        if sock is not None:
+            sock.close()
+        self._inbound.pop(pid, None)
+        self._outbound.pop(pid, None)
+
+    def _broadcast(self, line: bytes) -> None:
+        event = json.loads(line)
+        event["id"] = next(self._ids)
+        encoded = json.dumps(event).encode() + b"\n"
+        self._history.append(encoded)
+        for pid, pending in self._outbound.items():
+            if len(pending) + len(encoded) > self.MAX_PENDING_BYTES:
+                logger.warning(f"Worker {pid} is not reading alerts; dropping event {event['id']}")
+                continue
+            pending += encoded
+
+    def poll(self, timeout: float, watch=()) -> list:
+        """Moves relay traffic for up to timeout seconds; returns which of the watched fds are readable."""
+        readers = list(self.channels.values()) + list(watch)
+        writers = [self.channels[pid] for pid, pending in self._outbound.items() if pending]
+        readable, writable, _ = select.select(readers, writers, [], timeout)
+
+        for pid, sock in list(self.channels.items()):
+            if sock in readable:
+                try:
+                    data = sock.recv(65536)
+                except (BlockingIOError, InterruptedError):
+                    continue
+                except OSError:
+                    data = b""
+                if not data:
+                    self.remove(pid)
+                    continue
+                buffer = self._inbound[pid]
+                buffer += data
+                *lines, rest = bytes(buffer).split(b"\n")
+                self._inbound[pid] = bytearray(rest)
+                for line in lines:
+                    if line:
+                        self._broadcast(line)
+
+        for pid, sock in list(self.channels.items()):
+            if sock in writable and self._outbound.get(pid):
+                try:
+                    sent = sock.send(self._outbound[pid])
+                except (BlockingIOError, InterruptedError):
+                    continue
+                except OSError:
+                    self.remove(pid)
+                    continue
+                del self._outbound[pid][:sent]
+
+        return [fd for fd in watch if fd in readable]
+
+class WorkerServer(uvicorn.Server):
+    """uvicorn server that tells the parent, through a pipe, once it is accepting requests."""
+    def __init__(self, config, ready_fd: int):
+        super().__init__(config)
+        self.ready_fd = ready_fd
+
+    async def startup(self, sockets=None):
+        await super().startup(sockets=sockets)
+        try:
+            if self.started:
+                os.write(self.ready_fd, b"1")
+            os.close(self.ready_fd)
+        except OSError:
+            # The parent only listens while rolling workers
+            pass
+
+class PreforkServer:
+    def __init__(self, app, sock: socket.socket, workers: int):
+        self.app = app
+        self.sock = sock
+        self.num_workers = workers
+        self.workers = set()
+        self.retiring = set()
+        self.ready_fds = {}
+        self.relay = AlertRelay(settings.ALERT_HISTORY_SIZE)
+        self.stopping = False
+        self.reload_requested = False
+
+    def _freeze(self):
+        # Move everything loaded so far out of the collector's reach so workers don't dirty it
+        gc.collect()
+        gc.freeze()
+
+    def spawn(self, track_ready: bool = False) -> int:
+        read_fd, write_fd = os.pipe()
+        parent_sock, worker_sock = socket.socketpair()
+        pid = os.fork()
+        if pid:
+            os.close(write_fd)
+            worker_sock.close()
+            self.relay.add(pid, parent_sock)
+            self.workers.add(pid)
+            if track_ready:
+                self.ready_fds[pid] = read_fd
+            else:
+                os.close(read_fd)
+            return pid
+
+        # Worker: reset the parent's handlers; uvicorn installs its own for graceful shutdown
+        for sig in (signal.SIGTERM, signal.SIGINT, signal.SIGHUP, signal.SIGCHLD):
+            signal.signal(sig, signal.SIG_DFL)
+        os.close(read_fd)
+        for fd in self.ready_fds.values():
+            os.close(fd)
+        parent_sock.close()
+        for sock in self.relay.channels.values():
+            sock.close()
+        from services.alert_hub import alert_hub
+        alert_hub.attach_relay(worker_sock)
+        from db.database import engine
+        # Never reuse connections the parent may have opened
+        engine.sync_engine.dispose(close=False)
+
+        config = uvicorn.Config(
+            self.app,
+            lifespan="on",
+            timeout_graceful_shutdown=int(settings.WORKER_SHUTDOWN_TIMEOUT),
+            log_level="info",
+        )
+        try:
+            WorkerServer(config, write_fd).run(sockets=[self.sock])
+        finally:
+            os._exit(0)
+
+    def wait_ready(self, pid: int, timeout: float) -> bool:
+        """Blocks until the worker has started serving; False if it exits or times out first."""
+        fd = self.ready_fds[pid]
+        deadline = time.monotonic() + timeout
+        try:
+            while time.monotonic() < deadline:
+                # Keep relaying alerts while a replacement starts
+                if self.relay.poll(0.5, watch=[fd]):
+                    # EOF without the ready byte means the worker died during startup
+                    return os.read(fd, 1) == b"1"
+                self.reap()
+                if pid not in self.workers:
+                    return False
+            return False
+        finally:
+            self.ready_fds.pop(pid, None)
+            os.close(fd)
+
+    def stop_worker(self, pid: int) -> None:
+        self.retiring.add(pid)
+        try:
+            os.kill(pid, signal.SIGTERM)
+        except ProcessLookupError:
+            pass
+
+    def reap(self) -> None:
+        while True:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                return
+            if pid == 0:
+                return
+            if pid in self.workers:
+                self.workers.discard(pid)
+                self.relay.remove(pid)
+                if pid in self.retiring:
+                    self.retiring.discard(pid)
+                elif not self.stopping:
+                    logger.warning(f"Worker {pid} exited with status {status}; respawning")
+                    self.spawn()
+
+    def reload_model(self) -> None:
+        from services.ml_service import ml_service
+        from services.shap_service import shap_service
+
+        previous = ml_service.model_version
+        gc.unfreeze()
+        try:
+            # Raises and keeps the current model (and workers) if the new artifact won't load
+            ml_service.reload()
+            shap_service.reload()
+        finally:
+            self._freeze()
+        logger.info(f"Model reloaded: {previous} -> {ml_service.model_version}; rolling workers")
+
+        # Bring each replacement up before retiring an old worker so capacity never drops to zero
+        for pid in list(self.workers - self.retiring):
+            replacement = self.spawn(track_ready=True)
+            if not self.wait_ready(replacement, settings.WORKER_STARTUP_TIMEOUT):
+                if replacement in self.workers:
+                    self.stop_worker(replacement)
+                raise RuntimeError(f"replacement worker {replacement} did not start; remaining old workers kept")
+            self.stop_worker(pid)
+
+    def _handle_stop(self, signum, frame):
+        self.stopping = True
+
+    def _handle_hup(self, signum, frame):
+        self.reload_requested = True
+
+    def run(self) -> None:
+        from ml import registry
+        from services.ml_service import ml_service
+
+        signal.signal(signal.SIGTERM, self._handle_stop)
+        signal.signal(signal.SIGINT, self._handle_stop)
+        signal.signal(signal.SIGHUP, self._handle_hup)
+
+        self._freeze()
+        for _ in range(self.num_workers):
+            self.spawn()
+        logger.info(f"Serving with {self.num_workers} workers (model {ml_service.model_version})")
+
+        last_check = time.monotonic()
+        while not self.stopping:
+            self.relay.poll(0.5)
+            self.reap()
+
+            if time.monotonic() - last_check >= settings.MODEL_WATCH_INTERVAL:
+                last_check = time.monotonic()
+                try:
+                    current = registry.current_version()
+                except OSError as e:
+                    logger.error(f"Model registry check failed: {e}")
+                    current = None
+                # A version that already failed to load is only retried on SIGHUP
+                if current and current != ml_service.model_version and current not in ml_service.failed_versions:
+                    self.reload_requested = True
+
+            if self.reload_requested:
+                self.reload_requested = False
+                try:
+                    self.reload_model()
+                except Exception as e:
+                    logger.error(f"Model reload failed, keeping current workers: {e}")
+
+        logger.info("Shutting down workers...")
+        for pid in list(self.workers):
+            self.stop_worker(pid)
+        deadline = time.monotonic() + settings.WORKER_SHUTDOWN_TIMEOUT
+        while self.workers and time.monotonic() < deadline:
+            time.sleep(0.1)
+            self.reap()
+        for pid in list(self.workers):
+            os.kill(pid, signal.SIGKILL)
+
+def main():
+    logging.basicConfig(level=logging.INFO)
+    workers = max(1, settings.WEB_CONCURRENCY)
+    port = int(os.getenv("PORT", 8000))
+
+    size_db_pool(workers)
+    sock = bind_socket("0.0.0.0", port)
+
+    # Import after sizing the pool: this builds the engine, model and explainer in the parent
+    from main import app
+
+    PreforkServer(app, sock, workers).run()
+    sys.exit(0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+import asyncio
+import itertools
+import json
+import logging
+import time
+from collections import Counter, deque
+from datetime import datetime, timezone
+from typing import Optional
+from core.config import settings
+
+logger = logging.getLogger(__name__)
+
+class AlertSubscriber:
+    def __init__(self, institution_id: Optional[str], buffer_size: int, all_institutions: bool = False):
+        self.institution_id = institution_id
+        self.all_institutions = all_institutions
+        self.queue = asyncio.Queue(maxsize=buffer_size)
+        self.dropped = False
+
+    def accepts(self, event: dict) -> bool:
+        # Cross-tenant delivery must be asked for explicitly; a missing institution matches nothing
+        if self.all_institutions:
+            return True
+        return self.institution_id is not None and event["institution_id"] == self.institution_id
+
+class AlertHub:
+    """
+    In-process publish/subscribe for crisis and critical-risk alerts.
+
+    Each subscriber gets a bounded queue; a subscriber that falls behind is
+    disconnected rather than allowed to grow memory or slow publishers. A
+    short ring buffer of recent events lets reconnecting clients resume from
+    their Last-Event-ID. Publishing must happen on the event loop thread.
+
+    Under serve.py every worker is connected to the parent, which numbers
+    each published event and relays it to all workers; each worker then
+    delivers it to its own subscribers. Ids and history are therefore the
+    same in every worker, so a client can resume on any of them.
+    """
+    def __init__(self, buffer_size: int, history_size: int):
+        self.buffer_size = buffer_size
+        self._subscribers = set()
+        self._history = deque(maxlen=history_size)
+        # Millisecond-based start keeps ids increasing across restarts, so stale ids replay everything buffered
+        self._ids = itertools.count(int(time.time() * 1000))
+        self._relay_sock = None
+        self._relay_writer = None
+        self._relay_task = None
+        self.stats = Counter()
+
+    def attach_relay(self, sock) -> None:
+        """Called in a forked worker with its end of the parent's relay socket; used once start() runs."""
+        self._relay_sock = sock
+
+    async def start(self) -> None:
+        if self._relay_sock is None or self._relay_task is not None:
+            return
+        reader, self._relay_writer = await asyncio.open_connection(sock=self._relay_sock)
+        self._relay_task = asyncio.create_task(self._read_relay(reader))
+
+    async def _read_relay(self, reader) -> None:
+        while True:
+            line = await reader.readline()
+            if not line:
+                break
+            self._deliver(json.loads(line))
+        # Parent went away: keep serving this worker's own subscribers
+        logger.warning("Alert relay closed; delivering locally only")
+        self._relay_writer = None
+
+    def publish(self, event_type: str, data: dict, institution_id: Optional[str] = None) -> dict:
+        event = {
+            "type": event_type,
+            "institution_id": institution_id,
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "data": data,
+        }
+        self.stats["published"] += 1
+        if self._relay_writer is not None:
+            # The parent assigns the id and sends it back to every worker, this one included
+            self._relay_writer.write(json.dumps(event).encode() + b"\n")
+            return event
+        event["id"] = next(self._ids)
+        self._deliver(event)
+        return event
+
+    def _deliver(self, event: dict) -> None:
+        self._history.append(event)
+
+        for subscriber in list(self._subscribers):
+            if not subscriber.accepts(event):
+                continue
+            try:
+                subscriber.queue.put_nowait(event)
+                self.stats["delivered"] += 1
+            except asyncio.QueueFull:
+                self._drop(subscriber)
+        return event
+
+    def subscribe(self, institution_id: Optional[str] = None, last_event_id: Optional[int] = None,
+                  all_institutions: bool = False) -> AlertSubscriber:
+        subscriber = AlertSubscriber(institution_id, self.buffer_size, all_institutions)
+        if last_event_id is not None:
+            missed = [e for e in self._history if e["id"] > last_event_id and subscriber.accepts(e)]
+            # Only the newest events fit in the buffer; older ones are already stale for a live dashboard
+            for event in missed[-self.buffer_size:]:
+                subscriber.queue.put_nowait(event)
+            self.stats["replayed"] += min(len(missed), self.buffer_size)
+        self._subscribers.add(subscriber)
+        self.stats["subscribed"] += 1
+        return subscriber
+
+    def unsubscribe(self, subscriber: AlertSubscriber) -> None:
+        self._subscribers.discard(subscriber)
+
+    def _drop(self, subscriber: AlertSubscriber) -> None:
+        subscriber.dropped = True
+        self._subscribers.discard(subscriber)
+        self.stats["dropped_subscribers"] += 1
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscribers)
+
+alert_hub = AlertHub(settings.ALERT_SUBSCRIBER_BUFFER, settings.ALERT_HISTORY_SIZE)
@@ -1,15 +1,28 @@
+from .alert_hub import alert_hub
+
 class AlertService:
     @staticmethod
-    def trigger_intervention(student_name: str) -> str:
+    def trigger_intervention(student_name: str, student_id: str = None, institution_id: str = None, risk_score: float = None) -> str:
         # In production, this would send an email/Slack/SMS to a counselor
         msg = f"ALERT: Immediate intervention required for {student_name}. High dropout risk detected."
         print(msg)
+        alert_hub.publish("critical_risk", {
+            "student_id": student_id,
+            "student_name": student_name,
+            "risk_score": risk_score,
+            "message": msg
+        }, institution_id=institution_id)
         return msg
 
     @staticmethod
-    def trigger_crisis_alert(student_name: str) -> str:
+    def trigger_crisis_alert(student_name: str, student_id: str = None, institution_id: str = None) -> str:
         msg = f"EMERGENCY ALERT: Mental health crisis detected for {student_name}."
         print(msg)
+        alert_hub.publish("crisis", {
+            "student_id": student_id,
+            "student_name": student_name,
+            "message": msg
+        }, institution_id=institution_id)
         return msg
 
 alert_service = AlertService()
\ No newline at end of file
@@ -0,0 +1,225 @@
+import argparse
+import asyncio
+import json
+import os
+import uuid
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Optional
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+from sqlalchemy import JSON, Boolean, DateTime, Float, Integer, delete, select
+from core.config import settings
+from db.database import AsyncSessionLocal
+from db import models
+
+# Tables that grow without bound; everything else stays in the OLTP database
+ARCHIVED_MODELS = {
+    "mental_health_logs": models.MentalHealthLog,
+    "risk_predictions": models.RiskPrediction,
+}
+
+def _arrow_type(column):
+    if isinstance(column.type, DateTime):
+        return pa.timestamp("us")
+    if isinstance(column.type, Float):
+        return pa.float64()
+    if isinstance(column.type, Integer):
+        return pa.int64()
+    if isinstance(column.type, Boolean):
+        return pa.bool_()
+    # Strings, and JSON serialised to text so archived rows round-trip exactly
+    return pa.string()
+
+def arrow_schema(model) -> pa.Schema:
+    return pa.schema([pa.field(c.name, _arrow_type(c)) for c in model.__table__.columns])
+
+def _table_dir(table_name: str) -> str:
+    return os.path.join(settings.ARCHIVE_DIR, table_name)
+
+def _write_table(part_dir: str, table: pa.Table) -> str:
+    """
+    Writes one Parquet file sorted by student, so each row group covers a
+    narrow student_id range and per-student reads skip the rest by their
+    min/max statistics. The rename makes the file visible atomically.
+    """
+    sort_keys = [("student_id", "ascending"), ("created_at", "ascending")]
+    table = table.sort_by(sort_keys)
+    path = os.path.join(part_dir, f"part-{uuid.uuid4().hex}.parquet")
+    tmp = os.path.join(part_dir, f".{os.path.basename(path)}.tmp")
+    pq.write_table(
+        table, tmp, compression=settings.ARCHIVE_COMPRESSION,
+        row_group_size=settings.ARCHIVE_ROW_GROUP_SIZE,
+        # Recorded in the footer so compaction can tell sorted files apart
+        sorting_columns=pq.SortingColumn.from_ordering(table.schema, sort_keys)
+    )
+    os.replace(tmp, path)
+    return path
+
+def _write_partition(table_name: str, day: str, schema: pa.Schema, rows: list) -> str:
+    """Writes one Parquet file under <table>/date=<day>/."""
+    part_dir = os.path.join(_table_dir(table_name), f"date={day}")
+    os.makedirs(part_dir, exist_ok=True)
+    columns = {name: [row[name] for row in rows] for name in schema.names}
+    return _write_table(part_dir, pa.Table.from_pydict(columns, schema=schema))
+
+def _compact_partition(part_dir: str, schema: pa.Schema) -> bool:
+    """
+    Rewrites a day's files as one sorted file, e.g. files written before
+    sorting or many small batches. The new file lands before the old ones are
+    removed; readers de-duplicate by id in between.
+    """
+    files = sorted(f for f in os.listdir(part_dir) if f.endswith(".parquet"))
+    if not files:
+        return False
+    if len(files) == 1:
+        metadata = pq.ParquetFile(os.path.join(part_dir, files[0])).metadata
+        if metadata.num_row_groups > 0 and metadata.row_group(0).sorting_columns:
+            return False
+    table = ds.dataset([os.path.join(part_dir, f) for f in files], format="parquet", schema=schema).to_table()
+    # Rows a crash left in two files are kept once
+    seen, keep = set(), []
+    for i, row_id in enumerate(table["id"].to_pylist()):
+        if row_id not in seen:
+            seen.add(row_id)
+            keep.append(i)
+    _write_table(part_dir, table.take(keep))
+    for name in files:
+        os.remove(os.path.join(part_dir, name))
+    return True
+
+async def archive_table(table_name: str, retention_days: int, batch_size: int) -> int:
+    """
+    Moves rows older than the retention horizon into date-partitioned Parquet
+    files, one batch per transaction. Files are written before rows are
+    deleted, so a crash can leave a row in both places but never in neither;
+    readers de-duplicate by id.
+    """
+    model = ARCHIVED_MODELS[table_name]
+    schema = arrow_schema(model)
+    json_columns = [c.name for c in model.__table__.columns if isinstance(c.type, JSON)]
+    cutoff = datetime.utcnow() - timedelta(days=retention_days)
+    moved = 0
+
+    while True:
+        async with AsyncSessionLocal() as session:
+            result = await session.execute(
+                select(*model.__table__.columns)
+                .where(model.created_at < cutoff)
+                .order_by(model.created_at)
+                .limit(batch_size)
+            )
+            rows = [dict(r._mapping) for r in result]
+            if not rows:
+                break
+
+            by_day = defaultdict(list)
+            for row in rows:
+                for name in json_columns:
+                    row[name] = json.dumps(row[name]) if row[name] is not None else None
+                by_day[row["created_at"].date().isoformat()].append(row)
+
+            for day, day_rows in by_day.items():
+                await asyncio.to_thread(_write_partition, table_name, day, schema, day_rows)
+
+            await session.execute(delete(model).where(model.id.in_([r["id"] for r in rows])))
+            await session.commit()
+            moved += len(rows)
+            print(f"Archived {moved} rows from {table_name} (through {rows[-1]['created_at']})")
+
+    return moved
+
+def _partition_days(table_name: str, start: datetime, end: Optional[datetime]) -> list:
+    """date= partitions inside [start, end], newest first; only directory names are read."""
+    root = _table_dir(table_name)
+    if not os.path.isdir(root):
+        return []
+    first = start.date().isoformat()
+    last = end.date().isoformat() if end is not None else None
+    days = [
+        name[len("date="):] for name in os.listdir(root)
+        if name.startswith("date=")
+    ]
+    return sorted((d for d in days if d >= first and (last is None or d <= last)), reverse=True)
+
+def archived_days(table_name: str, start: Optional[datetime] = None, end: Optional[datetime] = None) -> list:
+    """Archived day partitions inside [start, end], oldest first."""
+    return _partition_days(table_name, start or datetime.min, end)[::-1]
+
+def read_archived_day(table_name: str, day: str, expr=None) -> list:
+    """
+    One day's archived rows matching a pyarrow filter expression, oldest
+    first, as plain dicts. Ids a crashed archive run wrote twice are kept once.
+    """
+    model = ARCHIVED_MODELS[table_name]
+    # Explicit schema so files written before a column was added read back with nulls
+    schema = arrow_schema(model)
+    json_columns = [c.name for c in model.__table__.columns if isinstance(c.type, JSON)]
+    part_dir = os.path.join(_table_dir(table_name), f"date={day}")
+    table = ds.dataset(part_dir, format="parquet", schema=schema).to_table(filter=expr)
+
+    rows, seen = [], set()
+    for row in table.sort_by([("created_at", "ascending")]).to_pylist():
+        if row["id"] in seen:
+            continue
+        seen.add(row["id"])
+        for name in json_columns:
+            row[name] = json.loads(row[name]) if row[name] is not None else None
+        rows.append(row)
+    return rows
+
+def _read_archived(table_name: str, student_id: str, start: Optional[datetime], end: Optional[datetime], limit: Optional[int]) -> list:
+    if start is None:
+        start = (end or datetime.utcnow()) - timedelta(days=settings.ARCHIVE_READ_MAX_DAYS)
+
+    expr = (ds.field("student_id") == student_id) & (ds.field("created_at") >= pa.scalar(start, pa.timestamp("us")))
+    if end is not None:
+        expr = expr & (ds.field("created_at") < pa.scalar(end, pa.timestamp("us")))
+
+    # Walk day partitions newest first and stop once the page is full. Files are sorted
+    # by student, so within each day only the row group covering student_id is decoded
+    rows = []
+    for day in _partition_days(table_name, start, end):
+        rows += read_archived_day(table_name, day, expr)[::-1]
+        if limit is not None and len(rows) >= limit:
+            break
+    return rows[:limit] if limit is not None else rows
+
+async def read_archived(table_name: str, student_id: str, start: Optional[datetime] = None,
+                        end: Optional[datetime] = None, limit: Optional[int] = None) -> list:
+    """
+    Archived rows for one student, newest first, as plain dicts. Without a
+    start date only the last ARCHIVE_READ_MAX_DAYS before end are searched.
+    """
+    return await asyncio.to_thread(_read_archived, table_name, student_id, start, end, limit)
+
+async def run_archive(tables: list, retention_days: int, batch_size: int) -> dict:
+    return {name: await archive_table(name, retention_days, batch_size) for name in tables}
+
+def compact_archive(table_name: str) -> int:
+    """Rewrites every day partition of a table that is not yet a single sorted file."""
+    schema = arrow_schema(ARCHIVED_MODELS[table_name])
+    return sum(
+        _compact_partition(os.path.join(_table_dir(table_name), f"date={day}"), schema)
+        for day in _partition_days(table_name, datetime.min, None)
+    )
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Move old rows into compressed Parquet archives.")
+    parser.add_argument("--table", choices=list(ARCHIVED_MODELS), action="append",
+                        help="Table to archive (repeatable, defaults to all)")
+    parser.add_argument("--days", type=int, default=settings.ARCHIVE_RETENTION_DAYS)
+    parser.add_argument("--batch-size", type=int, default=settings.ARCHIVE_BATCH_SIZE)
+    parser.add_argument("--compact", action="store_true",
+                        help="Rewrite each day's files as one file sorted by student instead of archiving")
+    args = parser.parse_args()
+
+    tables = args.table or list(ARCHIVED_MODELS)
+    if args.compact:
+        for name in tables:
+            print(f"{name}: {compact_archive(name)} partitions compacted")
+    else:
+        totals = asyncio.run(run_archive(tables, args.days, args.batch_size))
+        for name, count in totals.items():
+            print(f"{name}: {count} rows archived")
@@ -0,0 +1,288 @@
+import asyncio
+from datetime import datetime, timedelta
+from typing import Optional
+from sqlalchemy import delete, func, select
+from core.config import settings
+from core.tenant_cache import make_tenant_cache
+from db.database import AsyncSessionLocal
+from db.locks import cluster_lock
+from db import models
+from ml import registry
+from .ml_service import ml_service
+
+FLAGGED_LEVELS = ("High", "Critical")
+
+class GroupStats:
+    """
+    Count, flag count and running mean/M2 of risk scores for one group.
+    Welford updates make it removable; Chan's formula makes it mergeable.
+    """
+    __slots__ = ("n", "flagged", "mean", "m2")
+
+    def __init__(self, n: int = 0, flagged: int = 0, mean: float = 0.0, m2: float = 0.0):
+        self.n, self.flagged, self.mean, self.m2 = n, flagged, mean, m2
+
+    def add(self, score: float, flagged: bool) -> None:
+        self.n += 1
+        self.flagged += int(flagged)
+        delta = score - self.mean
+        self.mean += delta / self.n
+        self.m2 += delta * (score - self.mean)
+
+    def remove(self, score: float, flagged: bool) -> None:
+        if self.n <= 1:
+            self.n, self.flagged, self.mean, self.m2 = 0, 0, 0.0, 0.0
+            return
+        new_mean = (self.n * self.mean - score) / (self.n - 1)
+        self.m2 = max(0.0, self.m2 - (score - self.mean) * (score - new_mean))
+        self.mean = new_mean
+        self.n -= 1
+        self.flagged -= int(flagged)
+
+    def merge(self, other: "GroupStats") -> None:
+        if other.n == 0:
+            return
+        n = self.n + other.n
+        delta = other.mean - self.mean
+        self.m2 += other.m2 + delta * delta * self.n * other.n / n
+        self.mean += delta * other.n / n
+        self.n = n
+        self.flagged += other.flagged
+
+    @property
+    def variance(self) -> float:
+        return self.m2 / (self.n - 1) if self.n > 1 else 0.0
+
+    @property
+    def flag_rate(self) -> float:
+        return self.flagged / self.n if self.n else 0.0
+
+    def to_dict(self) -> dict:
+        return {"n": self.n, "flagged": self.flagged, "mean": self.mean, "m2": self.m2}
+
+def _band(value, cuts, labels, missing="unknown"):
+    if value is None:
+        return missing
+    for cut, label in zip(cuts, labels):
+        if value < cut:
+            return label
+    return labels[-1]
+
+def assign_groups(row) -> dict:
+    """Audit dimensions derivable from the student record."""
+    return {
+        "ses": _band(row.financial_stress_score, (0.3, 0.6), ("low_stress", "moderate_stress", "high_stress")),
+        "family_support": _band(row.family_support_score, (0.4, 0.7), ("low", "medium", "high")),
+        "age": _band(row.age, (21, 25), ("under_21", "21_24", "25_plus")),
+        "institution": row.institution_id or "unassigned",
+    }
+
+class BiasAuditEngine:
+    """
+    Incrementally maintained fairness audit over each student's latest
+    prediction (student_risk_current). Only projection rows changed since the
+    stored watermark are read; a per-student ledger lets an updated student's
+    old contribution be subtracted before the new one is added. State is
+    committed chunk by chunk, so an interrupted run resumes where it stopped.
+
+    Aggregates are kept per institution; an institution's report reads only
+    its own partition and the platform-wide report merges them all.
+
+    Runs are serialized across workers by a database-wide lock, and state is
+    loaded only once it is held: two runs interleaving their ledger and
+    aggregate writes would double-count or subtract what was never added.
+    """
+    def __init__(self, chunk_size: int, settle_seconds: float):
+        self.chunk_size = chunk_size
+        self.settle = timedelta(seconds=settle_seconds)
+        self._lock = asyncio.Lock()
+        self._cache = make_tenant_cache("bias_audit", max_entries=2)
+
+    async def _load_state(self, session, version: str):
+        state = await session.get(models.BiasAuditState, version)
+        stale_ledger = (await session.execute(
+            select(models.BiasAuditLedger.student_id)
+            .where(models.BiasAuditLedger.model_version != version)
+            .limit(1)
+        )).first()
+        # Aggregates from before they were partitioned by institution can't be split either
+        legacy = state is not None and state.aggregates and "by_institution" not in state.aggregates
+        if state is None or stale_ledger is not None or legacy:
+            # Contributions recorded under another model can't be subtracted safely: start over
+            await session.execute(delete(models.BiasAuditLedger))
+            if state is None:
+                state = models.BiasAuditState(model_version=version)
+                session.add(state)
+            state.watermark, state.aggregates, state.rows_processed = None, {}, 0
+            await session.commit()
+        return state
+
+    def _decode(self, aggregates: dict) -> dict:
+        return {
+            institution: {
+                dim: {group: GroupStats(**stats) for group, stats in groups.items()}
+                for dim, groups in dims.items()
+            }
+            for institution, dims in aggregates.get("by_institution", {}).items()
+        }
+
+    def _encode(self, aggregates: dict) -> dict:
+        return {"by_institution": {
+            institution: {
+                dim: {group: stats.to_dict() for group, stats in groups.items() if stats.n}
+                for dim, groups in dims.items()
+            }
+            for institution, dims in aggregates.items()
+        }}
+
+    async def _apply_chunk(self, session, state, aggregates: dict, rows: list, version: str) -> None:
+        ids = [r.student_id for r in rows]
+        ledger = {
+            entry.student_id: entry for entry in (await session.execute(
+                select(models.BiasAuditLedger).where(models.BiasAuditLedger.student_id.in_(ids))
+            )).scalars()
+        }
+
+        additions = {}
+        for row in rows:
+            flagged = row.risk_level in FLAGGED_LEVELS
+            groups = assign_groups(row)
+            entry = ledger.get(row.student_id)
+            if entry is not None:
+                previous = aggregates.setdefault(entry.groups["institution"], {})
+                for dim, group in entry.groups.items():
+                    previous.setdefault(dim, {}).setdefault(group, GroupStats()).remove(entry.risk_score, entry.flagged)
+                entry.risk_score, entry.flagged, entry.groups, entry.model_version = row.risk_score, flagged, groups, version
+            else:
+                session.add(models.BiasAuditLedger(
+                    student_id=row.student_id, model_version=version,
+                    risk_score=row.risk_score, flagged=flagged, groups=groups
+                ))
+            partial = additions.setdefault(groups["institution"], {})
+            for dim, group in groups.items():
+                partial.setdefault(dim, {}).setdefault(group, GroupStats()).add(row.risk_score, flagged)
+
+        # Fold the chunk's partial aggregates into the running totals
+        for institution, dims in additions.items():
+            merge_dimensions(aggregates.setdefault(institution, {}), dims)
+
+        state.aggregates = self._encode(aggregates)
+        # Chunks from the settle window may end behind the stored watermark; never move it back
+        state.watermark = max(filter(None, (state.watermark, rows[-1].updated_at)))
+        state.rows_processed = (state.rows_processed or 0) + len(rows)
+        state.computed_at = datetime.utcnow()
+        await session.commit()
+
+    def _version(self) -> str:
+        # The promoted pointer is shared by every worker, so old and new workers agree on it
+        # during a rolling reload instead of resetting each other's state
+        promoted = registry.current_version()
+        if promoted and promoted not in ml_service.failed_versions:
+            return promoted
+        return ml_service.model_version or "unknown"
+
+    async def run(self, institution_id: Optional[str] = None) -> dict:
+        """Report for one institution, or across all of them when institution_id is None."""
+        async with self._lock, cluster_lock("bias-audit"), AsyncSessionLocal() as session, AsyncSessionLocal() as reader:
+            version = self._version()
+            started = datetime.utcnow()
+            state = await self._load_state(session, version)
+            latest = (await reader.execute(select(func.max(models.StudentRiskCurrent.updated_at)))).scalar()
+
+            cache_key = (version, latest)
+            report = self._cache.get(institution_id, cache_key)
+            if report is not None:
+                return report
+
+            aggregates = self._decode(state.aggregates or {})
+            current = models.StudentRiskCurrent
+            query = (
+                select(
+                    current.student_id, current.risk_score, current.risk_level, current.updated_at,
+                    models.Student.age, models.Student.financial_stress_score,
+                    models.Student.family_support_score, models.Student.institution_id
+                )
+                .join(models.Student, models.Student.id == current.student_id)
+                .where(current.risk_score.isnot(None))
+                .order_by(current.updated_at)
+                .execution_options(yield_per=self.chunk_size)
+            )
+            # updated_at is stamped before commit, so a slow transaction can land behind the
+            # watermark; the settle window re-reads those rows and the ledger makes that idempotent
+            if state.watermark is not None:
+                query = query.where(current.updated_at >= state.watermark - self.settle)
+
+            result = await reader.stream(query)
+            async for rows in result.partitions(self.chunk_size):
+                await self._apply_chunk(session, state, aggregates, rows, version)
+
+            if institution_id is None:
+                scoped = {}
+                for dims in aggregates.values():
+                    merge_dimensions(scoped, dims)
+            else:
+                scoped = aggregates.get(institution_id, {})
+            report = build_report(scoped, version, state.watermark)
+            # Until the newest write is older than the settle window, an uncommitted earlier
+            # write could still appear without changing the cache key
+            if latest is None or started - latest > self.settle:
+                self._cache.set(institution_id, cache_key, report)
+            return report
+
+def merge_dimensions(target: dict, source: dict) -> None:
+    """Merges {dim: {group: GroupStats}} into target in place; source is left untouched."""
+    for dim, groups in source.items():
+        for group, stats in groups.items():
+            target.setdefault(dim, {}).setdefault(group, GroupStats()).merge(stats)
+
+def build_report(aggregates: dict, version: str, watermark) -> dict:
+    dimensions = {}
+    for dim, groups in aggregates.items():
+        live = {g: s for g, s in groups.items() if s.n}
+        rates = [s.flag_rate for s in live.values()]
+        mean_rate = sum(rates) / len(rates) if rates else 0.0
+        dimensions[dim] = {
+            "groups": {
+                g: {
+                    "count": s.n,
+                    "flag_rate": round(s.flag_rate, 4),
+                    "mean_score": round(s.mean, 4),
+                    "score_variance": round(s.variance, 4),
+                } for g, s in sorted(live.items())
+            },
+            "parity_difference": round(max(rates) - min(rates), 4) if rates else 0.0,
+            "flag_rate_variance": round(sum((r - mean_rate) ** 2 for r in rates) / len(rates), 4) if rates else 0.0,
+        }
+
+    worst = max(dimensions.items(), key=lambda kv: kv[1]["parity_difference"], default=(None, None))
+    max_parity = worst[1]["parity_difference"] if worst[1] else 0.0
+
+    recommendations = []
+    for dim, stats in dimensions.items():
+        if stats["parity_difference"] > settings.BIAS_PARITY_ALERT:
+            groups = stats["groups"]
+            high = max(groups, key=lambda g: groups[g]["flag_rate"])
+            low = min(groups, key=lambda g: groups[g]["flag_rate"])
+            recommendations.append(
+                f"Review {dim} parity: '{high}' is flagged at {groups[high]['flag_rate']:.0%} "
+                f"vs {groups[low]['flag_rate']:.0%} for '{low}'"
+            )
+    if not recommendations:
+        recommendations.append("No group exceeds the parity threshold; continue periodic audits")
+
+    students = sum(s["count"] for s in dimensions.get("institution", {}).get("groups", {}).values())
+    return {
+        "model_version": version,
+        "data_watermark": watermark.isoformat() if watermark else None,
+        "students_audited": students,
+        "dimensions": dimensions,
+        # Summary fields consumed by the admin dashboard; no gender or location data is collected
+        "ses_variance": dimensions.get("ses", {}).get("flag_rate_variance", 0.0),
+        "gender_variance": None,
+        "location_variance": None,
+        "demographic_parity_diff": max_parity,
+        "overall_bias_score": round(100 * (1 - max_parity)),
+        "recommendations": recommendations,
+    }
+
+bias_audit_engine = BiasAuditEngine(settings.BIAS_AUDIT_CHUNK_SIZE, settings.BIAS_AUDIT_SETTLE_SECONDS)
@@ -0,0 +1,58 @@
+import asyncio
+from fastapi.concurrency import run_in_threadpool
+from db.database import AsyncSessionLocal
+from db import models
+from .shap_service import shap_service
+from .risk_projection import update_drivers
+
+class ExplanationService:
+    """
+    Computes SHAP values for stored predictions outside the request path and
+    persists them, so each prediction is explained at most once. Only the
+    model that produced a prediction may explain it: once another version is
+    serving, a pending explanation is marked stale instead.
+    """
+    def __init__(self):
+        self._in_flight = {}
+
+    async def _compute(self, features: dict) -> dict:
+        return await run_in_threadpool(shap_service.explain, features)
+
+    async def explain_prediction(self, db, prediction: models.RiskPrediction) -> models.RiskPrediction:
+        if prediction.explanation_status == "ready" and prediction.shap_values is not None:
+            return prediction
+        if not prediction.features:
+            prediction.explanation_status = "failed"
+            await db.commit()
+            return prediction
+        if prediction.explanation_status == "stale":
+            return prediction
+        if prediction.model_version is None or prediction.model_version != shap_service.model_version:
+            prediction.explanation_status = "stale"
+            await db.commit()
+            return prediction
+
+        # A background task and a reader may race for the same prediction; share one computation
+        task = self._in_flight.get(prediction.id)
+        if task is None:
+            task = asyncio.ensure_future(self._compute(prediction.features))
+            self._in_flight[prediction.id] = task
+            task.add_done_callback(lambda _: self._in_flight.pop(prediction.id, None))
+
+        try:
+            prediction.shap_values = await asyncio.shield(task)
+            prediction.explanation_status = "ready"
+            await update_drivers(db, prediction)
+        except Exception as e:
+            print(f"ExplanationService Error: {e}")
+            prediction.explanation_status = "failed"
+        await db.commit()
+        return prediction
+
+    async def explain_in_background(self, prediction_id: str) -> None:
+        async with AsyncSessionLocal() as db:
+            prediction = await db.get(models.RiskPrediction, prediction_id)
+            if prediction is not None:
+                await self.explain_prediction(db, prediction)
+
+explanation_service = ExplanationService()
@@ -0,0 +1,183 @@
+import argparse
+import asyncio
+from datetime import datetime
+from typing import Optional
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+from sqlalchemy import select
+from core.config import settings
+from db.database import ReadSessionLocal
+from db import models
+from ml.dataset import FEATURE_NAMES
+from .archive_service import archived_days, read_archived_day
+
+FORMATS = {
+    "arrow": ("application/vnd.apache.arrow.stream", "arrows"),
+    "parquet": ("application/vnd.apache.parquet", "parquet"),
+}
+
+SHAP_COLUMNS = [f"shap_{name}" for name in FEATURE_NAMES]
+
+EXPORT_SCHEMA = pa.schema(
+    [
+        pa.field("prediction_id", pa.string()),
+        pa.field("student_id", pa.string()),
+        pa.field("institution_id", pa.string()),
+        pa.field("risk_score", pa.float64()),
+        pa.field("risk_level", pa.string()),
+        pa.field("explanation_status", pa.string()),
+        pa.field("created_at", pa.timestamp("us")),
+    ]
+    + [pa.field(name, pa.float64()) for name in SHAP_COLUMNS]
+)
+
+class _ChunkSink:
+    """Write-only file object that hands back whatever was written since the last drain."""
+    def __init__(self):
+        self._chunks = []
+        self._position = 0
+        self.closed = False
+
+    def write(self, data) -> int:
+        data = bytes(data)
+        self._chunks.append(data)
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks = []
+        return data
+
+def build_query(start: Optional[datetime] = None, end: Optional[datetime] = None,
+                institution_id: Optional[str] = None, risk_level: Optional[str] = None):
+    p = models.RiskPrediction
+    query = (
+        select(p.id, p.student_id, p.institution_id, p.risk_score, p.risk_level,
+               p.explanation_status, p.created_at, p.shap_values)
+        .order_by(p.created_at)
+    )
+    if start is not None:
+        query = query.where(p.created_at >= start)
+    if end is not None:
+        query = query.where(p.created_at < end)
+    if institution_id is not None:
+        query = query.where(p.institution_id == institution_id)
+    if risk_level is not None:
+        query = query.where(p.risk_level == risk_level)
+    return query
+
+def rows_to_batch(rows) -> pa.RecordBatch:
+    """Column-wise conversion of one cursor chunk, flattening SHAP JSON into per-feature columns."""
+    columns = [[] for _ in range(7)]
+    shap_columns = [[] for _ in FEATURE_NAMES]
+    for row in rows:
+        for i in range(7):
+            columns[i].append(row[i])
+        shap = row[7] or {}
+        for i, name in enumerate(FEATURE_NAMES):
+            shap_columns[i].append(shap.get(name))
+    arrays = [pa.array(values, type=field.type) for values, field in zip(columns + shap_columns, EXPORT_SCHEMA)]
+    return pa.RecordBatch.from_arrays(arrays, schema=EXPORT_SCHEMA)
+
+def archive_filter(start: Optional[datetime] = None, end: Optional[datetime] = None,
+                   institution_id: Optional[str] = None, risk_level: Optional[str] = None):
+    """build_query's filters as a pyarrow expression over archived rows."""
+    expr = ds.scalar(True)
+    if start is not None:
+        expr = expr & (ds.field("created_at") >= pa.scalar(start, pa.timestamp("us")))
+    if end is not None:
+        expr = expr & (ds.field("created_at") < pa.scalar(end, pa.timestamp("us")))
+    if institution_id is not None:
+        expr = expr & (ds.field("institution_id") == institution_id)
+    if risk_level is not None:
+        expr = expr & (ds.field("risk_level") == risk_level)
+    return expr
+
+async def iter_archived_batches(chunk_size: int, start: Optional[datetime] = None,
+                                end: Optional[datetime] = None, **filters):
+    """Archived predictions in the range, one day partition in memory at a time."""
+    expr = archive_filter(start, end, **filters)
+    for day in archived_days("risk_predictions", start, end):
+        rows = await asyncio.to_thread(read_archived_day, "risk_predictions", day, expr)
+        for i in range(0, len(rows), chunk_size):
+            yield rows_to_batch([
+                (r["id"], r["student_id"], r["institution_id"], r["risk_score"], r["risk_level"],
+                 r["explanation_status"], r["created_at"], r["shap_values"])
+                for r in rows[i:i + chunk_size]
+            ])
+
+async def iter_record_batches(chunk_size: int, **filters):
+    """
+    Archived rows first, then the hot table. Archiving moves the oldest rows,
+    so the output stays in created_at order. A row is in both places only
+    between a crashed archive run and the next one.
+    """
+    async for batch in iter_archived_batches(chunk_size, **filters):
+        yield batch
+    # yield_per streams through a server-side cursor, so only one chunk is ever in memory
+    async with ReadSessionLocal() as session:
+        result = await session.stream(build_query(**filters).execution_options(yield_per=chunk_size))
+        async for rows in result.partitions(chunk_size):
+            yield rows_to_batch(rows)
+
+async def stream_export(fmt: str = "arrow", chunk_size: int = None, **filters):
+    """
+    Yields encoded bytes batch by batch: Arrow IPC stream or Parquet (one row
+    group per chunk). Filters are build_query's; archived rows are included.
+    """
+    chunk_size = chunk_size or settings.EXPORT_CHUNK_SIZE
+    sink = _ChunkSink()
+    if fmt == "parquet":
+        writer = pq.ParquetWriter(sink, EXPORT_SCHEMA, compression=settings.ARCHIVE_COMPRESSION)
+    else:
+        writer = pa.ipc.new_stream(sink, EXPORT_SCHEMA)
+
+    try:
+        async for batch in iter_record_batches(chunk_size, **filters):
+            writer.write_batch(batch)
+            data = sink.drain()
+            if data:
+                yield data
+    finally:
+        writer.close()
+    data = sink.drain()
+    if data:
+        yield data
+
+async def export_to_file(path: str, fmt: str, **filters) -> int:
+    written = 0
+    with open(path, "wb") as f:
+        async for data in stream_export(fmt, **filters):
+            f.write(data)
+            written += len(data)
+    return written
+
+def _parse_date(value: str) -> datetime:
+    return datetime.fromisoformat(value)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export risk predictions with flattened SHAP values.")
+    parser.add_argument("--out", required=True)
+    parser.add_argument("--format", choices=list(FORMATS), default="parquet")
+    parser.add_argument("--start", type=_parse_date)
+    parser.add_argument("--end", type=_parse_date)
+    parser.add_argument("--institution-id")
+    parser.add_argument("--risk-level")
+    args = parser.parse_args()
+
+    size = asyncio.run(export_to_file(
+        args.out, args.format,
+        start=args.start, end=args.end, institution_id=args.institution_id, risk_level=args.risk_level
+    ))
+    print(f"Wrote {size} bytes to {args.out}")
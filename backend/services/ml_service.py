@@ -1,47 +1,66 @@
 import numpy as np
-import pandas as pd
 from sklearn.ensemble import RandomForestClassifier
-import pickle
-import os
+from core.config import settings
+from ml import registry
+from ml.dataset import FEATURE_NAMES, synthetic_dataset
+
+class ModelLoadError(Exception):
+    pass
 
 class MLService:
     def __init__(self):
         self.model = None
-        self.feature_names = ['attendance_rate', 'gpa', 'financial_stress_score', 'family_support_score']
+        self.model_version = None
+        self.feature_names = FEATURE_NAMES
+        # Promoted versions whose artifact could not be loaded; watchers must not retry them
+        self.failed_versions = set()
         self._initialize_model()
 
+    def _load_promoted(self):
+        version = registry.current_version()
+        if not version:
+            raise ModelLoadError("no promoted model")
+        try:
+            model, version = registry.load_model(version, compact=settings.USE_COMPACT_MODEL)
+        except Exception as e:
+            self.failed_versions.add(version)
+            raise ModelLoadError(f"model version {version} failed to load: {e}") from e
+        self.failed_versions.discard(version)
+        return model, version
+
+    def _use(self, model, version: str) -> None:
+        # Single-row inference is slower with joblib dispatch than without it
+        model.n_jobs = 1
+        self.model, self.model_version = model, version
+
     def _initialize_model(self):
-        # In a real app, load from disk. Here we train a synthetic one at startup.
-        print("MLService: Initializing model with synthetic data...")
-        np.random.seed(42)
-        n_samples = 1000
-        
-        data = {
-            'attendance_rate': np.random.uniform(20, 100, n_samples),
-            'gpa': np.random.uniform(0, 4, n_samples),
-            'financial_stress_score': np.random.uniform(0, 1, n_samples),
-            'family_support_score': np.random.uniform(0, 1, n_samples)
-        }
-        df = pd.DataFrame(data)
-        
-        # Simple rule: High dropout if low attendance, low gpa, high financial stress, low support
-        # We calculate a score and threshold it
-        risk_score = (
-            (100 - df['attendance_rate']) * 0.4 + 
-            (4 - df['gpa']) * 10 + 
-            df['financial_stress_score'] * 20 + 
-            (1 - df['family_support_score']) * 20
-        )
-        df['dropout'] = (risk_score > 40).astype(int)
-        
-        self.model = RandomForestClassifier(n_estimators=100, random_state=42)
-        self.model.fit(df[self.feature_names], df['dropout'])
-        print("MLService: Model training complete.")
+        # Prefer the promoted artifact; fall back to a synthetic model so the API still boots
+        try:
+            self._use(*self._load_promoted())
+            print(f"MLService: Loaded model version {self.model_version}.")
+        except ModelLoadError as e:
+            print(f"MLService: {e}, training on synthetic data...")
+            X, y = synthetic_dataset()
+            model = RandomForestClassifier(n_estimators=100, random_state=42, n_jobs=-1)
+            model.fit(X, y)
+            self._use(model, "synthetic")
+            print("MLService: Model training complete.")
+
+    def reload(self) -> str:
+        """
+        Swaps in the currently promoted model. Raises ModelLoadError and keeps
+        serving the current model if it cannot be loaded; never falls back to
+        the synthetic model once running.
+        """
+        self._use(*self._load_promoted())
+        return self.model_version
+
+    def to_features(self, student_data: dict) -> np.ndarray:
+        return np.array([[student_data[f] for f in self.feature_names]], dtype=np.float64)
 
     def predict_probability(self, student_data: dict) -> float:
-        input_df = pd.DataFrame([student_data])[self.feature_names]
         # predict_proba returns [prob_class_0, prob_class_1]
-        prob = self.model.predict_proba(input_df)[0][1]
+        prob = self.model.predict_proba(self.to_features(student_data))[0][1]
         return float(prob)
 
-ml_service = MLService()
\ No newline at end of file
+ml_service = MLService()
@@ -10,23 +10,30 @@ class RiskEngine:
         if score < 0.8: return "High"
         return "Critical"
 
-    async def assess_student(self, student_data: dict) -> dict:
+    async def assess_student(self, student_data: dict, explain: bool = True) -> dict:
         # 1. ML Prediction
         score = ml_service.predict_probability(student_data)
+        version = ml_service.model_version
         level = self.classify_risk(score)
         
-        # 2. SHAP Explanation
-        explanation = shap_service.explain(student_data)
+        # 2. SHAP Explanation (callers may defer it to the explanation service)
+        explanation = shap_service.explain(student_data) if explain else None
         
         # 3. Alert Check
         alert_triggered = level == "Critical"
         alert_msg = None
         if alert_triggered:
-            alert_msg = alert_service.trigger_intervention(student_data.get('name', 'Student'))
+            alert_msg = alert_service.trigger_intervention(
+                student_data.get('name', 'Student'),
+                student_id=student_data.get('student_id'),
+                institution_id=student_data.get('institution_id'),
+                risk_score=score
+            )
             
         return {
             "risk_score": score,
             "risk_level": level,
+            "model_version": version,
             "shap_values": explanation,
             "alert_triggered": alert_triggered,
             "alert_message": alert_msg
@@ -0,0 +1,163 @@
+import argparse
+import asyncio
+from datetime import datetime
+from sqlalchemy import case, delete, select, update
+from db.database import engine, AsyncSessionLocal
+from db import models
+
+# Same threshold the history endpoint uses for its trend slope
+TREND_DELTA = 0.05
+TOP_DRIVERS = 3
+
+def top_drivers(shap_values: dict, n: int = TOP_DRIVERS):
+    """Features pushing risk up the most, largest impact first."""
+    if not shap_values:
+        return None
+    ranked = sorted(shap_values.items(), key=lambda kv: kv[1], reverse=True)
+    return [{"feature": f, "impact": round(v, 4)} for f, v in ranked[:n] if v > 0]
+
+def classify_trend(previous_score, score) -> str:
+    if previous_score is None or score is None:
+        return "STABLE"
+    delta = score - previous_score
+    if delta > TREND_DELTA:
+        return "INCREASING_RISK"
+    if delta < -TREND_DELTA:
+        return "DECREASING_RISK"
+    return "STABLE"
+
+def _insert():
+    if engine.dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    return insert
+
+async def upsert_current(session, prediction: models.RiskPrediction, institution_id: str = None) -> None:
+    """
+    Folds a freshly flushed prediction into student_risk_current in a single
+    INSERT .. ON CONFLICT, so concurrent writers for the same student cannot
+    race. Older predictions arriving late never overwrite newer ones.
+    """
+    table = models.StudentRiskCurrent.__table__
+    now = datetime.utcnow()
+    stmt = _insert()(table).values(
+        student_id=prediction.student_id,
+        institution_id=institution_id,
+        prediction_id=prediction.id,
+        risk_score=prediction.risk_score,
+        risk_level=prediction.risk_level,
+        previous_score=None,
+        trend="STABLE",
+        top_drivers=top_drivers(prediction.shap_values),
+        predicted_at=prediction.created_at or now,
+        updated_at=now
+    )
+    delta = stmt.excluded.risk_score - table.c.risk_score
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[table.c.student_id],
+        set_={
+            "institution_id": stmt.excluded.institution_id,
+            "prediction_id": stmt.excluded.prediction_id,
+            "previous_score": table.c.risk_score,
+            "risk_score": stmt.excluded.risk_score,
+            "risk_level": stmt.excluded.risk_level,
+            "trend": case(
+                (delta > TREND_DELTA, "INCREASING_RISK"),
+                (delta < -TREND_DELTA, "DECREASING_RISK"),
+                else_="STABLE"
+            ),
+            "top_drivers": stmt.excluded.top_drivers,
+            "predicted_at": stmt.excluded.predicted_at,
+            "updated_at": stmt.excluded.updated_at,
+        },
+        where=stmt.excluded.predicted_at >= table.c.predicted_at
+    )
+    await session.execute(stmt)
+
+def _replace_if_newer():
+    """
+    Bulk upsert for rebuild: the same predicted_at guard as upsert_current,
+    so a live write landing mid-rebuild neither conflicts nor gets replaced
+    by an older history row.
+    """
+    table = models.StudentRiskCurrent.__table__
+    stmt = _insert()(table)
+    return stmt.on_conflict_do_update(
+        index_elements=[table.c.student_id],
+        set_={c.name: stmt.excluded[c.name] for c in table.columns if c.name != "student_id"},
+        where=stmt.excluded.predicted_at >= table.c.predicted_at
+    )
+
+async def update_drivers(session, prediction: models.RiskPrediction) -> None:
+    """Fills in drivers once a deferred explanation lands, if it is still the student's latest."""
+    await session.execute(
+        update(models.StudentRiskCurrent)
+        .where(models.StudentRiskCurrent.prediction_id == prediction.id)
+        .values(top_drivers=top_drivers(prediction.shap_values), updated_at=datetime.utcnow())
+    )
+
+async def rebuild(batch_size: int = 1000) -> int:
+    """
+    Recomputes the projection from risk_predictions. History is streamed in
+    (student_id, created_at) order, so only the current student's last two
+    predictions are held in memory.
+    """
+    p = models.RiskPrediction
+    # Plain columns rather than entities keep the session's identity map empty while streaming
+    stmt = (
+        select(p.id, p.student_id, p.risk_score, p.risk_level, p.shap_values, p.created_at, models.Student.institution_id)
+        .join(models.Student, models.Student.id == p.student_id)
+        .order_by(p.student_id, p.created_at)
+        .execution_options(yield_per=batch_size)
+    )
+
+    def to_row(latest, previous):
+        previous_score = previous.risk_score if previous else None
+        return {
+            "student_id": latest.student_id,
+            "institution_id": latest.institution_id,
+            "prediction_id": latest.id,
+            "risk_score": latest.risk_score,
+            "risk_level": latest.risk_level,
+            "previous_score": previous_score,
+            "trend": classify_trend(previous_score, latest.risk_score),
+            "top_drivers": top_drivers(latest.shap_values),
+            "predicted_at": latest.created_at,
+            "updated_at": datetime.utcnow(),
+        }
+
+    upsert = _replace_if_newer()
+    written = 0
+    async with AsyncSessionLocal() as reader, AsyncSessionLocal() as writer:
+        await writer.execute(delete(models.StudentRiskCurrent))
+        rows, latest, previous = [], None, None
+
+        result = await reader.stream(stmt)
+        async for prediction in result:
+            if latest is not None and prediction.student_id != latest.student_id:
+                rows.append(to_row(latest, previous))
+                latest = None
+            previous, latest = latest, prediction
+
+            if len(rows) >= batch_size:
+                await writer.execute(upsert, rows)
+                written += len(rows)
+                rows = []
+
+        if latest is not None:
+            rows.append(to_row(latest, previous))
+        if rows:
+            await writer.execute(upsert, rows)
+            written += len(rows)
+        await writer.commit()
+    return written
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Maintain the student_risk_current projection.")
+    parser.add_argument("command", choices=["rebuild"])
+    parser.add_argument("--batch-size", type=int, default=1000)
+    args = parser.parse_args()
+
+    count = asyncio.run(rebuild(args.batch_size))
+    print(f"student_risk_current rebuilt with {count} students")
@@ -4,7 +4,12 @@ from .ml_service import ml_service
 
 class SHAPService:
     def __init__(self):
+        self.reload()
+
+    def reload(self):
         self.explainer = shap.TreeExplainer(ml_service.model)
+        # Version the explainer was built from; stored predictions from any other can't use it
+        self.model_version = ml_service.model_version
 
     def explain(self, student_data: dict) -> dict:
         input_df = pd.DataFrame([student_data])[ml_service.feature_names]
@@ -0,0 +1,141 @@
+import asyncio
+import pytest
+from core.admission import AdmissionController, Rejected
+
+async def settle():
+    for _ in range(3):
+        await asyncio.sleep(0)
+
+def test_admits_up_to_limit_then_queues_in_order():
+    async def scenario():
+        controller = AdmissionController("t", max_limit=2, max_wait=1.0)
+        await controller.acquire()
+        await controller.acquire()
+        order = []
+
+        async def waiter(i):
+            await controller.acquire()
+            order.append(i)
+
+        tasks = [asyncio.create_task(waiter(i)) for i in range(3)]
+        await settle()
+        assert controller.snapshot()["queued"] == 3 and order == []
+        controller.release(None)
+        await settle()
+        assert order == [0]
+        controller.release(None)
+        controller.release(None)
+        await asyncio.gather(*tasks)
+        assert order == [0, 1, 2]
+        assert controller.in_flight == 2
+        assert controller.stats["admitted"] == 5 and controller.stats["waited"] == 3
+
+    asyncio.run(scenario())
+
+def test_full_queue_is_rejected_with_429():
+    async def scenario():
+        controller = AdmissionController("t", max_limit=1, max_wait=1.0, queue_factor=2)
+        await controller.acquire()
+        tasks = [asyncio.create_task(controller.acquire()) for _ in range(2)]
+        await settle()
+        with pytest.raises(Rejected) as rejected:
+            await controller.acquire()
+        assert rejected.value.status_code == 429
+        assert rejected.value.retry_after >= 1
+        for _ in range(3):
+            controller.release(None)
+        await asyncio.gather(*tasks)
+        assert controller.stats["rejected_queue_full"] == 1
+
+    asyncio.run(scenario())
+
+def test_deadline_rejects_with_503_and_leaves_the_queue():
+    async def scenario():
+        controller = AdmissionController("t", max_limit=1, max_wait=0.05)
+        await controller.acquire()
+        with pytest.raises(Rejected) as rejected:
+            await controller.acquire()
+        assert rejected.value.status_code == 503
+        assert controller.snapshot()["queued"] == 0
+        # The expired waiter must not be handed the slot when it frees up
+        controller.release(None)
+        assert controller.in_flight == 0
+
+    asyncio.run(scenario())
+
+def test_slot_granted_at_the_deadline_is_kept(monkeypatch):
+    async def scenario():
+        controller = AdmissionController("t", max_limit=1, max_wait=0.05)
+        await controller.acquire()
+
+        async def grant_then_time_out(future, timeout):
+            # The release lands in the same tick the deadline fires
+            controller.release(None)
+            raise asyncio.TimeoutError
+
+        monkeypatch.setattr(asyncio, "wait_for", grant_then_time_out)
+        await controller.acquire()
+        assert controller.in_flight == 1
+        assert controller.stats["rejected_deadline"] == 0
+
+    asyncio.run(scenario())
+
+def test_cancelled_waiter_gives_its_slot_back():
+    async def scenario():
+        controller = AdmissionController("t", max_limit=1, max_wait=1.0)
+        await controller.acquire()
+        waiting = asyncio.create_task(controller.acquire())
+        await settle()
+        # Granted but not yet resumed, then cancelled by a disconnecting client
+        controller.release(None)
+        assert controller.in_flight == 1
+        waiting.cancel()
+        try:
+            await waiting
+        except asyncio.CancelledError:
+            assert controller.in_flight == 0
+        else:
+            # Python < 3.12 wait_for returns a result that raced a cancellation;
+            # the caller then owns the slot and releases it as usual
+            assert controller.in_flight == 1
+            controller.release(None)
+            assert controller.in_flight == 0
+
+        # Cancelled before being granted: it just leaves the queue
+        await controller.acquire()
+        waiting = asyncio.create_task(controller.acquire())
+        await settle()
+        waiting.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiting
+        assert controller.snapshot()["queued"] == 0 and controller.in_flight == 1
+
+    asyncio.run(scenario())
+
+def test_limit_shrinks_over_target_and_grows_back():
+    async def scenario():
+        controller = AdmissionController("t", max_limit=10, min_limit=3, target_latency=0.1, window=10)
+        for _ in range(10):
+            await controller.acquire()
+            controller.release(0.5)
+        assert controller.limit == 8
+        for _ in range(30):
+            await controller.acquire()
+            controller.release(0.5)
+        assert controller.limit == 3  # floored at min_limit
+        for _ in range(20):
+            await controller.acquire()
+            controller.release(0.01)
+        assert controller.limit == 5
+
+    asyncio.run(scenario())
+
+def test_no_target_keeps_the_limit_fixed():
+    async def scenario():
+        controller = AdmissionController("t", max_limit=4, window=5)
+        for _ in range(20):
+            await controller.acquire()
+            controller.release(5.0)
+        assert controller.limit == 4
+
+    asyncio.run(scenario())
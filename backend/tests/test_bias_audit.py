@@ -0,0 +1,81 @@
+import random
+import numpy as np
+import pytest
+from services.bias_audit import GroupStats, build_report, merge_dimensions
+
+def stats_of(scores, flags=None):
+    stats = GroupStats()
+    for score, flagged in zip(scores, flags or [False] * len(scores)):
+        stats.add(score, flagged)
+    return stats
+
+def assert_matches(stats, scores, flagged=None):
+    assert stats.n == len(scores)
+    if flagged is not None:
+        assert stats.flagged == flagged
+    assert stats.mean == pytest.approx(np.mean(scores) if scores else 0.0)
+    assert stats.variance == pytest.approx(np.var(scores, ddof=1) if len(scores) > 1 else 0.0)
+
+def test_add_matches_numpy():
+    rng = random.Random(1)
+    scores = [rng.random() for _ in range(500)]
+    assert_matches(stats_of(scores), scores)
+
+def test_remove_undoes_add():
+    rng = random.Random(2)
+    scores = [rng.random() for _ in range(200)]
+    flags = [s > 0.7 for s in scores]
+    stats = stats_of(scores, flags)
+    # Remove in an order unrelated to insertion, as the ledger does
+    for i in sorted(range(200), key=lambda _: rng.random())[:150]:
+        stats.remove(scores[i], flags[i])
+        scores[i] = None
+    left = [s for s in scores if s is not None]
+    assert_matches(stats, left, flagged=sum(s > 0.7 for s in left))
+
+def test_removing_the_last_entry_resets():
+    stats = stats_of([0.4, 0.9], [False, True])
+    stats.remove(0.4, False)
+    stats.remove(0.9, True)
+    assert (stats.n, stats.flagged, stats.mean, stats.m2) == (0, 0, 0.0, 0.0)
+
+def test_merge_matches_combined_add():
+    rng = random.Random(3)
+    left = [rng.random() for _ in range(120)]
+    right = [rng.random() * 2 for _ in range(80)]
+    merged = stats_of(left)
+    merged.merge(stats_of(right))
+    assert_matches(merged, left + right)
+    # Merging into or from an empty group is a copy
+    empty = GroupStats()
+    empty.merge(stats_of(right))
+    assert_matches(empty, right)
+    merged.merge(GroupStats())
+    assert_matches(merged, left + right)
+
+def test_merge_dimensions_leaves_source_untouched():
+    source = {"ses": {"low": stats_of([0.1, 0.2])}}
+    target = {"ses": {"low": stats_of([0.3])}, "age": {"under_21": stats_of([0.5])}}
+    merge_dimensions(target, source)
+    assert target["ses"]["low"].n == 3
+    assert target["age"]["under_21"].n == 1
+    assert source["ses"]["low"].n == 2
+
+def test_report_parity_and_flag_rates():
+    aggregates = {
+        "ses": {
+            "low_stress": stats_of([0.1, 0.2, 0.9, 0.3], [False, False, True, False]),
+            "high_stress": stats_of([0.8, 0.9], [True, True]),
+            "moderate_stress": GroupStats(),
+        },
+        "institution": {"A": stats_of([0.1] * 6)},
+    }
+    report = build_report(aggregates, "v1", None)
+    ses = report["dimensions"]["ses"]
+    # Empty groups are left out of the report and the parity computation
+    assert set(ses["groups"]) == {"low_stress", "high_stress"}
+    assert ses["groups"]["low_stress"]["flag_rate"] == 0.25
+    assert ses["parity_difference"] == 0.75
+    assert report["demographic_parity_diff"] == 0.75
+    assert report["students_audited"] == 6
+    assert report["recommendations"][0].startswith("Review ses parity")
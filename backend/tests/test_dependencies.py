@@ -0,0 +1,33 @@
+import asyncio
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+from db import models
+from db.tenancy import session_tenant
+from core.dependencies import get_tenant_db, get_tenant_read_db
+
+@pytest.fixture
+def session():
+    with Session(create_engine("sqlite://")) as session:
+        yield session
+
+@pytest.mark.parametrize("dependency", [get_tenant_db, get_tenant_read_db])
+def test_institution_users_are_scoped(session, dependency):
+    user = models.User(role="counselor", institution_id="A")
+    assert session_tenant(asyncio.run(dependency(db=session, current_user=user))) == "A"
+
+@pytest.mark.parametrize("dependency", [get_tenant_db, get_tenant_read_db])
+def test_platform_admin_is_global(session, dependency):
+    user = models.User(role="admin", institution_id=None)
+    assert session_tenant(asyncio.run(dependency(db=session, current_user=user))) is None
+
+@pytest.mark.parametrize("dependency", [get_tenant_db, get_tenant_read_db])
+@pytest.mark.parametrize("role", ["student", "counselor", None])
+def test_unassigned_users_are_refused(session, dependency, role):
+    # e.g. self-registered, or migrated with a NULL institution
+    user = models.User(role=role, institution_id=None)
+    with pytest.raises(HTTPException) as exc:
+        asyncio.run(dependency(db=session, current_user=user))
+    assert exc.value.status_code == 403
+    assert "institution_id" not in session.info
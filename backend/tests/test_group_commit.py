@@ -0,0 +1,93 @@
+import asyncio
+import pytest
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from db import models
+from db.database import Base
+from db.group_commit import GroupCommitWriter
+
+def run(coro_fn, tmp_path, **writer_args):
+    """Runs coro_fn(writer, count_rows) against a fresh SQLite file with a started writer."""
+    async def main():
+        engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'gc.db'}")
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        factory = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+        async def count_rows():
+            async with factory() as session:
+                return (await session.execute(select(func.count(models.AuditLog.id)))).scalar()
+
+        writer = GroupCommitWriter(factory, **{"max_batch": 64, "max_delay_ms": 20, **writer_args})
+        writer.start()
+        try:
+            return await coro_fn(writer, count_rows)
+        finally:
+            await writer.stop()
+            await engine.dispose()
+    return asyncio.run(main())
+
+def log(i, row_id=None):
+    return models.AuditLog(id=row_id or f"log-{i}", user_id="u", action=f"job {i}")
+
+def test_concurrent_jobs_share_one_commit(tmp_path):
+    async def scenario(writer, count_rows):
+        results = await asyncio.gather(*(
+            writer.submit(lambda session, i=i: (session.add(log(i)), i)[1]) for i in range(10)
+        ))
+        return results, dict(writer.stats), await count_rows()
+
+    results, stats, rows = run(scenario, tmp_path)
+    assert results == list(range(10))
+    assert rows == 10
+    assert stats["batches"] == 1 and stats["jobs"] == 10
+
+def test_batch_is_capped_at_max_batch(tmp_path):
+    async def scenario(writer, count_rows):
+        await asyncio.gather(*(writer.add_all([log(i)]) for i in range(10)))
+        return dict(writer.stats)
+
+    stats = run(scenario, tmp_path, max_batch=4)
+    assert stats["jobs"] == 10
+    assert stats["batches"] == 3
+
+def test_failed_batch_replays_jobs_individually(tmp_path):
+    async def scenario(writer, count_rows):
+        jobs = [writer.add_all([log(1)]), writer.add_all([log(2, row_id="log-1")]), writer.add_all([log(3)])]
+        outcomes = await asyncio.gather(*jobs, return_exceptions=True)
+        return outcomes, dict(writer.stats), await count_rows()
+
+    outcomes, stats, rows = run(scenario, tmp_path)
+    # Only the duplicate key fails; its neighbours are committed on replay
+    assert outcomes[0] is None and outcomes[2] is None
+    assert isinstance(outcomes[1], Exception)
+    assert rows == 2
+    assert stats["batch_failures"] == 1
+    assert stats["job_failures"] == 1
+
+def test_async_work_and_errors_reach_the_caller(tmp_path):
+    async def scenario(writer, count_rows):
+        async def work(session):
+            session.add(log(1))
+            await session.flush()
+            return "flushed"
+
+        def broken(session):
+            raise ValueError("bad job")
+
+        ok = await writer.submit(work)
+        with pytest.raises(ValueError):
+            await writer.submit(broken)
+        return ok, await count_rows()
+
+    assert run(scenario, tmp_path) == ("flushed", 1)
+
+def test_stop_commits_queued_work(tmp_path):
+    async def scenario(writer, count_rows):
+        pending = [asyncio.ensure_future(writer.add_all([log(i)])) for i in range(5)]
+        await asyncio.sleep(0)
+        await writer.stop()
+        await asyncio.gather(*pending)
+        return await count_rows()
+
+    assert run(scenario, tmp_path) == 5
@@ -0,0 +1,105 @@
+import asyncio
+from types import SimpleNamespace
+import pytest
+from sqlalchemy import create_engine, select, update
+from db import models
+from db.database import Base
+from db.routing import RequestScopeMiddleware, _request_scope, make_routing_session_class, mark_write
+from core.config import settings
+
+def sqlite_engine():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    # Only .sync_engine is used, as on the AsyncEngines the app passes in
+    return SimpleNamespace(sync_engine=engine)
+
+@pytest.fixture
+def engines(monkeypatch):
+    monkeypatch.setattr(settings, "READ_ROUTING_ENABLED", True)
+    monkeypatch.setattr(settings, "READ_AFTER_WRITE_STICKY", True)
+    monkeypatch.setattr(settings, "READ_PRIMARY_PATHS", "")
+    primary, replica = sqlite_engine(), sqlite_engine()
+    return primary, replica, make_routing_session_class(primary, replica)
+
+@pytest.fixture
+def request_scope():
+    def enter(path="/api/v1/students/"):
+        return _request_scope.set({"path": path, "wrote": False})
+    tokens = []
+    yield lambda path="/api/v1/students/": tokens.append(enter(path))
+    for token in reversed(tokens):
+        _request_scope.reset(token)
+
+def bind_for_read(session):
+    return session.get_bind(clause=select(models.Student.id))
+
+def test_reads_use_the_replica_until_the_request_writes(engines, request_scope):
+    primary, replica, RoutingSession = engines
+    request_scope()
+    with RoutingSession() as session:
+        assert bind_for_read(session) is replica.sync_engine
+        session.add(models.Student(id="s1", name="Ada"))
+        session.flush()
+        # Read-your-writes: the row only exists on the primary so far
+        assert bind_for_read(session) is primary.sync_engine
+        assert session.execute(select(models.Student.id)).scalars().all() == ["s1"]
+    # Stickiness belongs to the request, not the session
+    with RoutingSession() as session:
+        assert bind_for_read(session) is primary.sync_engine
+
+def test_dml_always_goes_to_the_primary(engines, request_scope):
+    primary, replica, RoutingSession = engines
+    request_scope()
+    with RoutingSession() as session:
+        statement = update(models.Student).values(name="x")
+        assert session.get_bind(clause=statement) is primary.sync_engine
+
+def test_explicit_mark_write_makes_reads_sticky(engines, request_scope):
+    primary, replica, RoutingSession = engines
+    request_scope()
+    # Writes made outside the ORM flush, e.g. by the group-commit writer
+    mark_write()
+    with RoutingSession() as session:
+        assert bind_for_read(session) is primary.sync_engine
+
+def test_stickiness_can_be_turned_off(engines, request_scope, monkeypatch):
+    primary, replica, RoutingSession = engines
+    monkeypatch.setattr(settings, "READ_AFTER_WRITE_STICKY", False)
+    request_scope()
+    mark_write()
+    with RoutingSession() as session:
+        assert bind_for_read(session) is replica.sync_engine
+
+def test_primary_path_rule(engines, request_scope, monkeypatch):
+    primary, replica, RoutingSession = engines
+    monkeypatch.setattr(settings, "READ_PRIMARY_PATHS", "/api/v1/admin, /api/v1/alerts")
+    request_scope("/api/v1/alerts/history")
+    with RoutingSession() as session:
+        assert bind_for_read(session) is primary.sync_engine
+
+def test_outside_a_request_reads_use_the_replica(engines):
+    primary, replica, RoutingSession = engines
+    mark_write()  # no scope: nothing to mark
+    with RoutingSession() as session:
+        assert bind_for_read(session) is replica.sync_engine
+
+def test_each_request_gets_its_own_scope(engines):
+    primary, replica, RoutingSession = engines
+    binds = {}
+
+    async def app(scope, receive, send):
+        if scope["path"] == "/write":
+            mark_write()
+        await asyncio.sleep(0)
+        with RoutingSession() as session:
+            binds[scope["path"]] = bind_for_read(session)
+
+    async def scenario():
+        middleware = RequestScopeMiddleware(app)
+        await asyncio.gather(*(
+            middleware({"type": "http", "path": path}, None, None) for path in ("/write", "/read")
+        ))
+
+    asyncio.run(scenario())
+    assert binds == {"/write": primary.sync_engine, "/read": replica.sync_engine}
+    assert _request_scope.get() is None
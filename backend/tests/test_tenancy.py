@@ -0,0 +1,62 @@
+import pytest
+from sqlalchemy import create_engine, select, update
+from sqlalchemy.orm import Session
+from db import models, schemas
+from db.database import Base
+from db.tenancy import UnscopedQueryError, scope_session
+
+current = models.StudentRiskCurrent
+
+@pytest.fixture
+def engine():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    with Session(engine) as session:
+        session.add_all([
+            models.Student(id="a1", name="Ada", institution_id="A"),
+            models.Student(id="b1", name="Ben", institution_id="B"),
+            current(student_id="a1", institution_id="A", prediction_id="pa", risk_score=0.4, risk_level="Medium"),
+            current(student_id="b1", institution_id="B", prediction_id="pb", risk_score=0.9, risk_level="Critical"),
+        ])
+        session.commit()
+    return engine
+
+def test_current_risk_columns_are_scoped(engine):
+    # Same shape as GET /risk/current
+    query = select(*(getattr(current, name) for name in schemas.StudentRiskCurrent.model_fields))
+    with Session(engine) as session:
+        scope_session(session, "A")
+        rows = session.execute(query.order_by(current.risk_score.desc())).all()
+    assert [row.student_id for row in rows] == ["a1"]
+
+def test_core_columns_fail_closed(engine):
+    with Session(engine) as session:
+        scope_session(session, "A")
+        with pytest.raises(UnscopedQueryError):
+            session.execute(select(current.__table__.c.student_id))
+        with pytest.raises(UnscopedQueryError):
+            session.execute(
+                select(models.Student.id).join(current.__table__, current.__table__.c.student_id == models.Student.id)
+            )
+
+def test_get_and_update_are_scoped(engine):
+    with Session(engine) as session:
+        scope_session(session, "A")
+        assert session.get(models.Student, "b1") is None
+        assert session.get(models.Student, "a1") is not None
+        result = session.execute(update(current).where(current.prediction_id == "pb").values(risk_score=0.0))
+        assert result.rowcount == 0
+
+def test_unscoped_session_sees_every_institution(engine):
+    with Session(engine) as session:
+        scope_session(session, None)
+        assert session.execute(select(current.student_id)).scalars().all() != []
+        assert len(session.execute(select(current.__table__.c.student_id)).all()) == 2
+
+def test_new_rows_are_stamped_with_the_tenant(engine):
+    with Session(engine) as session:
+        scope_session(session, "A")
+        session.add(models.Student(id="a2", name="Cy", institution_id="B"))
+        session.commit()
+    with Session(engine) as session:
+        assert session.get(models.Student, "a2").institution_id == "A"
@@ -0,0 +1,61 @@
+from core import tenant_cache
+from core.tenant_cache import GLOBAL_TENANT, TenantCache
+
+def test_entry_quota_only_evicts_within_the_tenant():
+    cache = TenantCache("t", max_entries=3, max_tenants=10)
+    cache.set("small", "k", "small-value")
+    for i in range(10):
+        cache.set("big", i, i)
+    assert cache.get("small", "k") == "small-value"
+    assert [cache.get("big", i) for i in range(10)] == [None] * 7 + [7, 8, 9]
+    assert cache.stats["evictions"] == 7
+
+def test_entries_are_evicted_least_recently_used_first():
+    cache = TenantCache("t", max_entries=2, max_tenants=10)
+    cache.set("a", 1, "one")
+    cache.set("a", 2, "two")
+    assert cache.get("a", 1) == "one"
+    cache.set("a", 3, "three")
+    assert cache.get("a", 2) is None
+    assert (cache.get("a", 1), cache.get("a", 3)) == ("one", "three")
+
+def test_least_recently_used_tenant_is_evicted_whole():
+    cache = TenantCache("t", max_entries=5, max_tenants=2)
+    cache.set("a", "k", 1)
+    cache.set("b", "k", 2)
+    cache.get("a", "k")
+    cache.set("c", "k", 3)
+    assert cache.get("b", "k") is None
+    assert (cache.get("a", "k"), cache.get("c", "k")) == (1, 3)
+    assert cache.snapshot()["tenants"] == 2
+    assert cache.stats["tenant_evictions"] == 1
+
+def test_reads_never_create_namespaces():
+    cache = TenantCache("t", max_entries=5, max_tenants=1)
+    cache.set("a", "k", 1)
+    for tenant in ("b", "c", "d"):
+        assert cache.get(tenant, "k") is None
+    assert cache.get("a", "k") == 1
+
+def test_entries_expire_after_ttl(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(tenant_cache.time, "monotonic", lambda: now[0])
+    cache = TenantCache("t", max_entries=5, max_tenants=5, ttl=30)
+    cache.set("a", "k", "v")
+    now[0] += 29
+    assert cache.get("a", "k") == "v"
+    now[0] += 2
+    assert cache.get("a", "k") is None
+    assert cache.snapshot()["entries"] == 0
+
+def test_global_namespace_and_invalidation():
+    cache = TenantCache("t", max_entries=5, max_tenants=5)
+    cache.set(None, "k", "everyone")
+    cache.set("a", "k", "a-only")
+    assert cache.get(GLOBAL_TENANT, "k") == "everyone"
+    assert cache.get("a", "k") == "a-only"
+    cache.invalidate("a")
+    assert cache.get("a", "k") is None
+    assert cache.get(None, "k") == "everyone"
+    cache.invalidate()
+    assert cache.snapshot()["entries"] == 0